@@ -0,0 +1,41 @@
+import time
+
+import numpy as np
+
+from v1.engine.gravity.barnes_hut_gravity import BarnesHutGravity
+from v1.engine.gravity.batched_gravity import BatchedGravity
+
+# Force error of Barnes-Hut against the exact solver, to pick theta for an accuracy budget.
+# Run with: python -m v1.benchmarks.barnes_hut_accuracy
+
+n = 5000
+thetas = [0.2, 0.3, 0.5, 0.7, 1.0]
+
+rng = np.random.default_rng(42)
+# Cluster of earth-sized bodies with a dense core, which is harder than a uniform distribution
+positions = rng.normal(size=(n, 3)) * 15000000 * 20
+positions[:n // 4] *= 0.1
+masses = rng.uniform(0.5, 1.5, n) * 5.972e+24
+
+
+def relative_error(forces: np.ndarray, exact: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(forces - exact, axis=1) / np.linalg.norm(exact, axis=1)
+
+
+if __name__ == '__main__':
+    exact = np.zeros((n, 3))
+    start = time.perf_counter()
+    BatchedGravity().apply(positions, masses, exact)
+    print(f'exact (BatchedGravity), n={n}: {time.perf_counter() - start:.3f}s')
+
+    print(f'{"theta":>6} {"quadrupole":>10} {"median":>10} {"99%":>10} {"max":>10} {"time":>8}')
+    for theta in thetas:
+        for quadrupole in [False, True]:
+            forces = np.zeros((n, 3))
+            start = time.perf_counter()
+            BarnesHutGravity(theta, quadrupole).apply(positions, masses, forces)
+            duration = time.perf_counter() - start
+
+            error = relative_error(forces, exact)
+            print(f'{theta:>6} {str(quadrupole):>10} {np.median(error):>10.2e} {np.percentile(error, 99):>10.2e} '
+                  f'{error.max():>10.2e} {duration:>7.3f}s')
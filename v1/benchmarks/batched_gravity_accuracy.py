@@ -0,0 +1,99 @@
+import contextlib
+import io
+import random
+import sys
+
+import numpy as np
+
+from v1.engine.component.physical_component import PhysicalComponent
+from v1.engine.context.physics_context import PhysicsContext
+from v1.engine.gravity.batched_gravity import BatchedGravity
+from v1.engine.gravity.pairwise_gravity import PairwiseGravity
+from v1.engine.settings import Settings
+from v1.engine.simulation import Simulation
+from v1.engine.util.angle3d import Angle3D
+from v1.engine.util.quaternion import Quaternion
+from v1.engine.util.vector3d import Vector3D
+
+# Force error of BatchedGravity against the pair by pair reference on the bodies of the sun_earth and n_earth
+# simulations, at every frame of a run with the reference. Exits with an error when it's above tolerance.
+# Run with: python -m v1.benchmarks.batched_gravity_accuracy [frames]
+# The simulations themselves need Blender for their renderer, so their bodies are built here without one.
+
+tolerance = 1e-12
+
+
+def sun_earth() -> Simulation:
+    """ Bodies of v1/simulations/sun_earth.py """
+    Settings.delta = 1000 * 60 * 30
+    sim = Simulation([], [PhysicsContext(PairwiseGravity())], progress=False)
+    sim.add_component(PhysicalComponent(
+        name='sun',
+        position=Vector3D.zero(),
+        mass=1.9885e+30,
+        size=Vector3D(1392000000, 1392000000, 1392000000),
+        rotation=Quaternion.from_euler_angles(Angle3D.from_degrees(7.25, 0, 0)),
+        angular_velocity=Angle3D(0, 0, 1.997e6),
+    ))
+    sim.add_component(PhysicalComponent(
+        name='earth',
+        size=Vector3D(12756000, 12756000, 12756000),
+        position=Vector3D(0, -147098074000, 0),
+        mass=5.972e+24,
+        velocity=Vector3D(30290, 0, 0),
+        c_drag=0.3,
+    ))
+    return sim
+
+
+def n_earth() -> Simulation:
+    """ Bodies of v1/simulations/n_earth.py, seeded """
+    Settings.delta = 1000 * 60
+    rng = random.Random(0)
+    sim = Simulation([], [PhysicsContext(PairwiseGravity())], progress=False)
+    for i in range(20):
+        sim.add_component(PhysicalComponent(
+            name=f'earth-{i:06d}',
+            size=Vector3D(12756000, 12756000, 12756000),
+            position=Vector3D(
+                rng.randint(0, 20) * 15000000,
+                rng.randint(0, 20) * 15000000,
+                rng.randint(0, 10) * 15000000,
+            ),
+            mass=5.972e+24,
+            velocity=Vector3D(rng.randint(-20, 20), rng.randint(-20, 20), rng.randint(-20, 20)),
+            c_drag=0.3,
+        ))
+    return sim
+
+
+def max_error(sim: Simulation, frames: int) -> float:
+    """ Largest relative force error per body of BatchedGravity over frames of the simulation """
+    batched = BatchedGravity()
+    worst = 0.0
+    for _ in range(frames):
+        bodies = sim.bodies
+        exact, forces = np.zeros((bodies.count, 3)), np.zeros((bodies.count, 3))
+        PairwiseGravity().apply(bodies.positions, bodies.masses, exact)
+        batched.apply(bodies.positions, bodies.masses, forces)
+        error = np.linalg.norm(forces - exact, axis=1) / np.linalg.norm(exact, axis=1)
+        worst = max(worst, float(error.max()))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim.loop()
+    return worst
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    Settings.frame_limit = frames + 1
+
+    failed = False
+    print(f'{"simulation":>12} {"frames":>8} {"max error":>10}')
+    for name, build in [('sun_earth', sun_earth), ('n_earth', n_earth)]:
+        error = max_error(build(), frames)
+        failed = failed or error > tolerance
+        print(f'{name:>12} {frames:>8} {error:>10.2e}')
+
+    if failed:
+        sys.exit(f'BatchedGravity is off by more than {tolerance:.0e} relative to PairwiseGravity')
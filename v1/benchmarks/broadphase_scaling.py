@@ -0,0 +1,74 @@
+import sys
+import time
+
+import numpy as np
+
+from v1.engine.collision.broadphase import Broadphase
+from v1.engine.collision.spatial_hash import SpatialHash
+from v1.engine.collision.sweep_and_prune import SweepAndPrune
+
+# Time per frame of every broadphase for earth-sized bodies in different scenes, after the first frame (building).
+# Run with: python -m v1.benchmarks.broadphase_scaling [max_n]
+# A broadphase is skipped for larger N in a scene once a frame takes longer than time_budget seconds.
+
+sizes = [300, 1000, 3000, 10000, 30000]
+frames = 10
+time_budget = 10
+
+# Largest n per scene, sweep and prune keeps every pair overlapping on any axis, which takes GBs for aligned at 10000
+scenes = {'sparse': 30000, 'dense': 30000, 'aligned': 3000}
+
+broadphases: dict[str, type[Broadphase]] = {
+    'sweep-and-prune': SweepAndPrune,
+    'spatial-hash': SpatialHash,
+}
+
+radius = 12756000 * 3 ** 0.5 / 2  # Bounding radius of an earth
+
+
+def scene(name: str, n: int) -> np.ndarray:
+    """ Positions of n bodies, sparse: few overlaps, dense: n_earth swarm of the same density at any n, aligned: all
+    bodies overlap on the x axis
+    """
+    rng = np.random.default_rng(n)
+    if name == 'sparse':
+        return rng.uniform(0, 1, size=(n, 3)) * 2e8 * n ** (1 / 3)
+    if name == 'dense':
+        return rng.integers(0, round(20 * (n / 20) ** (1 / 3)), size=(n, 3)) * 15000000.0
+    return np.c_[rng.uniform(0, radius, n), rng.uniform(0, 1, size=(n, 2)) * 2e8 * n ** (1 / 2)]
+
+
+if __name__ == '__main__':
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else sizes[-1]
+
+    for scene_name, scene_max_n in scenes.items():
+        print(f'{scene_name}\n{"n":>8} {"pairs":>8} ' + ' '.join(f'{name:>16}' for name in broadphases))
+        skipped = set()
+        for n in [size for size in sizes if size <= min(max_n, scene_max_n)]:
+            positions = scene(scene_name, n)
+            velocities = np.random.default_rng(0).normal(0, 20 * 60, size=(n, 3))  # ~20 m/s for a minute
+            ids = np.arange(n)
+
+            row = []
+            pairs = None
+            for name, broadphase_type in broadphases.items():
+                if name in skipped:
+                    row.append(f'{"-":>16}')
+                    continue
+
+                broadphase = broadphase_type()
+                moved = positions.copy()
+                broadphase.update(ids, moved - radius, moved + radius)
+                start = time.perf_counter()
+                for _ in range(frames):
+                    moved += velocities
+                    result = broadphase.update(ids, moved - radius, moved + radius)
+                duration = (time.perf_counter() - start) / frames
+
+                # Both have to report the same pairs
+                assert pairs is None or pairs == result
+                pairs = result
+                row.append(f'{duration * 1000:>14.2f}ms')
+                if duration > time_budget / (sizes[1] / sizes[0]) ** 2:
+                    skipped.add(name)
+            print(f'{n:>8} {len(pairs) if pairs is not None else "-":>8} ' + ' '.join(row))
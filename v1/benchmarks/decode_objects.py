@@ -0,0 +1,57 @@
+import json
+import sys
+import time
+
+from v1.engine.component.physical_component import PhysicalComponent
+from v1.engine.storage.storage import Storage
+from v1.engine.util.helper import from_fqn, to_serializable
+from v1.engine.util.quaternion import Quaternion
+from v1.engine.util.vector3d import Vector3D
+
+# Time of decoding stored frames into objects, as read_as_objects does, with the generated decoders of
+# Storage.decode_recursive and with the reflection it used before, looking up the class of every object.
+# Run with: python -m v1.benchmarks.decode_objects [frames]
+
+components = 20
+
+
+def reflective(obj, max_depth: int = 9):
+    """ Storage.decode_recursive before decoders were generated """
+    if max_depth == 0:
+        return obj
+    if isinstance(obj, list):
+        return [reflective(item, max_depth - 1) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    if '_fqn' in obj:
+        return from_fqn(obj['_fqn'])(**{k: reflective(obj[k], max_depth - 1) for k in obj if k != '_fqn'})
+    return {k: reflective(obj[k], max_depth - 1) for k in obj}
+
+
+def frame(seed: int) -> dict:
+    """ Serialized frame as stored, { component_id: component } """
+    return json.loads(json.dumps({i: PhysicalComponent(
+        id=i,
+        name=f'earth-{i}',
+        mass=5.972e+24,
+        size=Vector3D(12756000, 12756000, 12756000),
+        position=Vector3D(seed * 1.5e7, i * 1.5e7, 0),
+        velocity=Vector3D(seed, -i, 0.5),
+        rotation=Quaternion(1, 0, 0, 0),
+    ) for i in range(components)}, default=to_serializable))
+
+
+if __name__ == '__main__':
+    frames = [frame(i) for i in range(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)]
+
+    durations = {}
+    for name, decode in {'reflection': reflective, 'generated': Storage.decode_recursive}.items():
+        start = time.perf_counter()
+        decoded = [decode(item) for item in frames]
+        durations[name] = time.perf_counter() - start
+
+        # Both have to build the same objects
+        assert json.dumps(decoded, default=to_serializable) == json.dumps(frames)
+        print(f'{name:>12} {durations[name] * 1000:>10.1f}ms {len(frames) / durations[name]:>10.0f} frames/s')
+
+    print(f'{"speedup":>12} {durations["reflection"] / durations["generated"]:>10.2f}x')
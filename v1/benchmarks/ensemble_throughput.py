@@ -0,0 +1,67 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from v1.engine.component.physical_component import PhysicalComponent
+from v1.engine.ensemble import Ensemble, final_state
+from v1.engine.settings import Settings
+from v1.engine.simulation import Simulation
+from v1.engine.util.vector3d import Vector3D
+
+# Runs per second of an ensemble of randomized n_earth simulations for every amount of worker processes up to the
+# amount of cores, every amount has to give the same results as running them one after the other in this process.
+# Run with: python -m v1.benchmarks.ensemble_throughput [runs]
+
+bodies = 20
+frames = 500
+
+
+def n_earth(seed: int) -> Simulation:
+    rng = random.Random(seed)
+    sim = Simulation([], [])
+    for i in range(bodies):
+        sim.add_component(PhysicalComponent(
+            name=f'earth-{i:06d}',
+            size=Vector3D(12756000, 12756000, 12756000),
+            position=Vector3D(
+                rng.randint(0, 20) * 15000000,
+                rng.randint(0, 20) * 15000000,
+                rng.randint(0, 10) * 15000000,
+            ),
+            mass=5.972e+24,
+            velocity=Vector3D(rng.randint(-20, 20), rng.randint(-20, 20), rng.randint(-20, 20)),
+        ))
+    return sim
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    Settings.delta = 1000 * 60
+    Settings.frame_limit = frames
+
+    expected = Ensemble(n_earth, processes=1).run(runs)
+
+    # Simulations in a single process must not interfere either, both are built before either runs
+    sims = [n_earth(i) for i in range(2)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, sim in enumerate(sims):
+            sim.start()
+            assert np.array_equal(final_state(sim).data, expected[i].data)
+
+    print(f'{"processes":>10} {"runs/s":>10} {"speedup":>10}')
+    baseline = None
+    processes = 1
+    while processes <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        results = Ensemble(n_earth, processes=processes).run(runs)
+        throughput = runs / (time.perf_counter() - start)
+
+        assert all(np.array_equal(a.data, b.data) for a, b in zip(results, expected))
+        baseline = baseline or throughput
+        print(f'{processes:>10} {throughput:>10.2f} {throughput / baseline:>9.2f}x')
+        processes *= 2
@@ -0,0 +1,57 @@
+import sys
+import time
+
+import numpy as np
+
+from v1.engine.gravity.barnes_hut_gravity import BarnesHutGravity
+from v1.engine.gravity.batched_gravity import BatchedGravity
+from v1.engine.gravity.fmm_gravity import FMMGravity
+from v1.engine.gravity.gravity_solver import GravitySolver
+from v1.engine.gravity.pairwise_gravity import PairwiseGravity
+
+# Time per frame of every gravity solver for N = 10^3 to 10^6, to see where each solver wins.
+# Run with: python -m v1.benchmarks.gravity_scaling [max_n]
+# A solver is skipped for larger N once a frame takes longer than time_budget seconds.
+
+sizes = [1000, 3000, 10000, 30000, 100000, 300000, 1000000]
+time_budget = 60
+
+solvers: dict[str, GravitySolver] = {
+    'pairwise': PairwiseGravity(),
+    'batched': BatchedGravity(),
+    'barnes-hut': BarnesHutGravity(0.5),
+    'fmm': FMMGravity(4),
+}
+
+
+def bodies(n: int) -> tuple[np.ndarray, np.ndarray]:
+    """ Earth-sized bodies spread through a cube, like n_earth but larger """
+    rng = np.random.default_rng(n)
+    positions = rng.uniform(0, 20, size=(n, 3)) * 15000000 * n ** (1 / 3)
+    masses = np.full(n, 5.972e+24)
+    return positions, masses
+
+
+if __name__ == '__main__':
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else sizes[-1]
+
+    print(f'{"n":>8} ' + ' '.join(f'{name:>12}' for name in solvers))
+    skipped = set()
+    for n in [size for size in sizes if size <= max_n]:
+        positions, masses = bodies(n)
+        row = []
+        for name, solver in solvers.items():
+            if name in skipped:
+                row.append(f'{"-":>12}')
+                continue
+
+            forces = np.zeros((n, 3))
+            start = time.perf_counter()
+            solver.apply(positions, masses, forces)
+            duration = time.perf_counter() - start
+
+            row.append(f'{duration:>11.3f}s')
+            # Assume the worst case of O(n**2) for the next size
+            if duration > time_budget / (sizes[1] / sizes[0]) ** 2:
+                skipped.add(name)
+        print(f'{n:>8} ' + ' '.join(row))
@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+
+from v1.engine.gravity.batched_gravity import BatchedGravity
+from v1.engine.integrator.block_timestep import BlockTimestep
+from v1.engine.integrator.drift import DriftReport
+from v1.engine.integrator.euler import SemiImplicitEuler
+from v1.engine.integrator.integrator import Integrator
+from v1.engine.integrator.leapfrog import Leapfrog
+from v1.engine.integrator.velocity_verlet import VelocityVerlet
+from v1.engine.integrator.yoshida import Yoshida4
+
+# Energy and angular momentum drift of every integrator over a year of the sun_earth setup, for steps of 30 minutes
+# (Settings.delta in sun_earth) up to 50 times larger.
+# Run with: python -m v1.benchmarks.integrator_drift
+
+base_delta = 60 * 30  # seconds
+step_factors = [1, 10, 25, 50]
+duration = 365.25 * 86400  # seconds
+
+integrators: dict[str, type[Integrator]] = {
+    'euler': SemiImplicitEuler,
+    'leapfrog': Leapfrog,
+    'velocity-verlet': VelocityVerlet,
+    'yoshida4': Yoshida4,
+    'block': BlockTimestep,
+}
+
+
+def sun_earth() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    positions = np.array([[0.0, 0.0, 0.0], [0.0, -147098074000, 0.0]])
+    velocities = np.array([[0.0, 0.0, 0.0], [30290, 0.0, 0.0]])
+    masses = np.array([1.9885e+30, 5.972e+24])
+    return positions, velocities, masses
+
+
+if __name__ == '__main__':
+    solver = BatchedGravity()
+    print(f'{"integrator":>16} {"step":>8} {"frames":>7} {"gravity":>8} {"energy":>10} {"momentum":>10} {"time":>8}')
+    for name, integrator_type in integrators.items():
+        for factor in step_factors:
+            positions, velocities, masses = sun_earth()
+            external = np.zeros_like(positions)
+            integrator = integrator_type()
+            report = DriftReport()
+            evaluations = 0
+
+            def gravity(p: np.ndarray, out: np.ndarray, targets: np.ndarray = None):
+                global evaluations
+                evaluations += 1
+                solver.apply(p, masses, out, targets)
+
+            dt = base_delta * factor
+            frames = int(duration / dt)
+            start = time.perf_counter()
+            report.record(positions, velocities, masses)
+            for _ in range(frames):
+                integrator.step(positions, velocities, masses, external, dt, gravity)
+                report.record(positions, velocities, masses)
+
+            print(f'{name:>16} {dt / 60:>6.0f}min {frames:>7} {evaluations:>8} {report.max_energy_drift:>10.2e} '
+                  f'{report.max_momentum_drift:>10.2e} {time.perf_counter() - start:>7.2f}s')
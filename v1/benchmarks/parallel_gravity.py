@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+from v1.benchmarks.gravity_scaling import bodies
+from v1.engine.gravity.batched_gravity import BatchedGravity
+from v1.engine.gravity.parallel_gravity import ParallelGravity
+
+# Time per frame of ParallelGravity for 1 up to the amount of cores in workers, and its speedup over BatchedGravity
+# in this process. Every amount of workers has to give the same forces.
+# Run with: python -m v1.benchmarks.parallel_gravity [n]
+
+frames = 5
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    positions, masses = bodies(n)
+
+    expected = np.zeros((n, 3))
+    start = time.perf_counter()
+    for _ in range(frames):
+        expected[:] = 0
+        BatchedGravity().apply(positions, masses, expected)
+    baseline = (time.perf_counter() - start) / frames
+    print(f'{"workers":>8} {"frame":>10} {"speedup":>10}\n{"batched":>8} {baseline:>9.3f}s {1:>9.2f}x')
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        solver = ParallelGravity(workers)
+        forces = np.zeros((n, 3))
+        solver.apply(positions, masses, forces)  # Starts the workers
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            forces[:] = 0
+            solver.apply(positions, masses, forces)
+        duration = (time.perf_counter() - start) / frames
+        solver.close()
+
+        assert np.array_equal(forces, expected)
+        print(f'{workers:>8} {duration:>9.3f}s {baseline / duration:>9.2f}x')
+        workers *= 2
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import random
+import sys
+import time
+
+from v1.engine.component.physical_component import PhysicalComponent
+from v1.engine.profiler import Profiler
+from v1.engine.settings import Settings
+from v1.engine.simulation import Simulation
+from v1.engine.util.vector3d import Vector3D
+
+# Time per loop of a small n_earth simulation without and with profiler, alternating so both see the same machine
+# state, and the phases of the last profiled run. Small simulations show the overhead most.
+# Run with: python -m v1.benchmarks.profiler_overhead [bodies]
+
+frames = 3000
+repeats = 3
+
+
+def n_earth(bodies: int, profiler: Profiler | None) -> Simulation:
+    rng = random.Random(0)
+    sim = Simulation([], [], profiler=profiler, progress=False)
+    for i in range(bodies):
+        sim.add_component(PhysicalComponent(
+            name=f'earth-{i:06d}',
+            size=Vector3D(12756000, 12756000, 12756000),
+            position=Vector3D(
+                rng.randint(0, 20) * 15000000,
+                rng.randint(0, 20) * 15000000,
+                rng.randint(0, 10) * 15000000,
+            ),
+            mass=5.972e+24,
+            velocity=Vector3D(rng.randint(-20, 20), rng.randint(-20, 20), rng.randint(-20, 20)),
+        ))
+    return sim
+
+
+if __name__ == '__main__':
+    bodies = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    Settings.delta = 1000 * 60
+    Settings.frame_limit = frames
+
+    best = {'off': float('inf'), 'on': float('inf')}
+    profiler = None
+    for _ in range(repeats):
+        for mode in best:
+            profiler = Profiler() if mode == 'on' else None
+            sim = n_earth(bodies, profiler)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                sim.start()
+            best[mode] = min(best[mode], (time.perf_counter() - start) / frames * 1e6)
+
+    print(f'{"profiler":>10} {"us/loop":>10}')
+    for mode, us in best.items():
+        print(f'{mode:>10} {us:>10.1f}')
+    print(f'overhead {best["on"] - best["off"]:.1f} us/loop\n')
+    print(profiler.report())
@@ -0,0 +1,30 @@
+from abc import abstractmethod
+
+import numpy as np
+
+
+class Broadphase:
+    """ Finds pairs of bodies whose bounding boxes overlap, candidates for an actual collision
+
+    Pairs are packed in a single int: smallest id << 32 | largest id, @see pair_key
+    """
+
+    @abstractmethod
+    def update(self, ids: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> set[int]:
+        """ Candidate pairs of the current frame, boxes touching each other do not overlap
+
+        :param ids: (N,) component ids of the bodies
+        :param lower: (N, 3) lower corner of the bounding box per body
+        :param upper: (N, 3) upper corner of the bounding box per body
+        :return: packed pair keys
+        """
+        pass
+
+
+def pair_key(a: int, b: int) -> int:
+    return (a << 32) | b if a < b else (b << 32) | a
+
+
+def unpack_keys(keys: int | np.ndarray) -> tuple[int, int] | tuple[np.ndarray, np.ndarray]:
+    """ Smallest and largest id of a packed pair key, or of every key in an array of them """
+    return keys >> 32, keys & 0xffffffff
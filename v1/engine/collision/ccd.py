@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def bounding_radius(sizes: np.ndarray) -> np.ndarray:
+    """ Radius of the sphere around the box of every body, (N,) """
+    return np.sqrt(np.einsum('ij,ij->i', sizes, sizes)) / 2
+
+
+def swept_bounds(start: np.ndarray, end: np.ndarray, radius: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ Lower and upper corner of the box around the sphere of every body moving from start to end """
+    return np.minimum(start, end) - radius[:, None], np.maximum(start, end) + radius[:, None]
+
+
+def time_of_impact(start_a: np.ndarray, end_a: np.ndarray, start_b: np.ndarray, end_b: np.ndarray,
+                   radius: np.ndarray) -> np.ndarray:
+    """ First moment spheres a and b touch while both move in a straight line from start to end, per pair
+
+    :param radius: (N,) sum of the radii of a and b
+    :return: (N,) fraction of the step in [0, 1], 0 if they already touch at the start, nan if they don't touch
+    """
+    # Relative position d(t) = offset + t * motion, solve |d(t)| = radius for the smallest t
+    offset = start_b - start_a
+    motion = (end_b - end_a) - offset
+    a = np.einsum('ij,ij->i', motion, motion)
+    b = np.einsum('ij,ij->i', offset, motion)
+    c = np.einsum('ij,ij->i', offset, offset) - radius ** 2
+    discriminant = b ** 2 - a * c
+
+    # Only approaching spheres can start touching, -b > 0, so c / (-b + sqrt) has no cancellation
+    approaching = (c > 0) & (b < 0) & (discriminant >= 0)
+    toi = np.full(len(a), np.nan)
+    toi[c <= 0] = 0.0
+    toi[approaching] = c[approaching] / (-b[approaching] + np.sqrt(discriminant[approaching]))
+    toi[toi > 1] = np.nan
+    return toi
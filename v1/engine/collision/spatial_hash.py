@@ -0,0 +1,74 @@
+from itertools import product
+
+import numpy as np
+
+from v1.engine.collision.broadphase import Broadphase
+from v1.engine.gravity.octree import ranges
+
+
+class SpatialHash(Broadphase):
+    """ Uniform grid broadphase, rebuilt every frame with numpy
+
+    Every box is put in all cells it touches, and only boxes sharing a cell are tested against each other. Unlike sweep
+    and prune this doesn't degrade when many bodies line up along an axis, which suits dense swarms of bodies of about
+    the same size. Bodies far larger than the cells are put in a lot of cells, so prefer SweepAndPrune for those.
+    """
+
+    """ Width of a cell in meters, None to use the largest box, so a box touches at most 2 cells per axis """
+    cell_size: float | None
+
+    def __init__(self, cell_size: float = None):
+        self.cell_size = cell_size
+
+    def update(self, ids: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> set[int]:
+        if len(ids) < 2:
+            return set()
+
+        origin = lower.min(axis=0)
+        extent = upper.max(axis=0) - origin
+        cell_size = self.cell_size if self.cell_size is not None else float((upper - lower).max())
+        # Cell coordinates have to fit in the packed cell key, 21 bits per axis
+        cell_size = max(cell_size, float(extent.max()) / (1 << 20), 1e-9)
+
+        low = np.floor((lower - origin) / cell_size).astype(np.int64)
+        high = np.floor((upper - origin) / cell_size).astype(np.int64)
+
+        # (body, cell) per touched cell, boxes touching more than 2 cells per axis are rare so they're added separately
+        span = high - low
+        bodies = []
+        cells = []
+        small = np.all(span <= 1, axis=1)
+        for offset in product([0, 1], repeat=3):
+            touched = small & np.all(low + offset <= high, axis=1)
+            bodies.append(np.flatnonzero(touched))
+            cells.append(low[touched] + offset)
+        for body in np.flatnonzero(~small).tolist():
+            grid = np.stack(np.meshgrid(*[np.arange(low[body, a], high[body, a] + 1) for a in range(3)]), axis=-1)
+            cells.append(grid.reshape((-1, 3)))
+            bodies.append(np.full(len(cells[-1]), body))
+        bodies = np.concatenate(bodies)
+        cells = np.concatenate(cells)
+        keys = (cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2]
+
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        bodies = bodies[order]
+        cells = cells[order]
+
+        # Every entry against the entries after it in the same cell
+        group_ends = np.r_[np.flatnonzero(keys[1:] != keys[:-1]) + 1, len(keys)]
+        ends = np.repeat(group_ends, np.diff(np.r_[0, group_ends]))
+        first = np.repeat(np.arange(len(keys)), ends - np.arange(len(keys)) - 1)
+        second = ranges(np.arange(len(keys)) + 1, ends)
+        a = bodies[first]
+        b = bodies[second]
+
+        # Pairs sharing multiple cells are only kept in the first shared cell, then the boxes have to really overlap
+        shared = np.all(cells[first] == np.maximum(low[a], low[b]), axis=1)
+        a, b = a[shared], b[shared]
+        overlap = np.all((lower[a] < upper[b]) & (lower[b] < upper[a]), axis=1)
+        a, b = a[overlap], b[overlap]
+
+        id_a = ids[a].astype(np.int64)
+        id_b = ids[b].astype(np.int64)
+        return set(((np.minimum(id_a, id_b) << 32) | np.maximum(id_a, id_b)).tolist())
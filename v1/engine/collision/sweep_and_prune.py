@@ -0,0 +1,156 @@
+import numpy as np
+
+from v1.engine.collision.broadphase import Broadphase, pair_key, unpack_keys
+from v1.engine.gravity.octree import ranges
+
+
+class SweepAndPrune(Broadphase):
+    """ Incremental sweep and prune, keeps the box endpoints sorted per axis between frames
+
+    Bodies move little per frame, so the endpoints are nearly sorted and insertion sort only does a few swaps. Every
+    swap of a lower endpoint with an upper endpoint of another body changes whether they overlap on that axis, so the
+    amount of overlapping axes is kept per pair and only pairs reaching or leaving 3 change the candidates.
+    """
+
+    """ Lower endpoints sort after upper endpoints at the same position, so touching boxes do not overlap """
+    _UPPER = 0
+    _LOWER = 1
+
+    def __init__(self):
+        # Per axis: endpoint value, owner (component id) and kind, sorted by (value, kind)
+        self._values = [[], [], []]
+        self._owners = [[], [], []]
+        self._kinds = [[], [], []]
+
+        # { pair_key: amount of axes the pair overlaps on }, only non-zero
+        self._counts: dict[int, int] = {}
+        self._pairs: set[int] = set()
+        self._ids: dict[int, int] = {}  # { component_id: row of the last update }
+
+    def update(self, ids: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> set[int]:
+        id_list = ids.astype(np.int64).tolist()
+        rows = {cid: row for row, cid in enumerate(id_list)}
+        row_of = np.zeros(max(id_list, default=0) + 1, dtype=np.int64)
+        row_of[id_list] = np.arange(len(id_list))
+
+        removed = self._ids.keys() - rows.keys()
+        if removed:
+            self._remove(removed)
+        added = [cid for cid in id_list if cid not in self._ids]
+        self._ids = rows
+
+        if len(added) * 4 > len(id_list):
+            # Inserting a lot of bodies one by one costs O(n**2) swaps, sorting from scratch is far cheaper
+            self._rebuild(ids.astype(np.int64), lower, upper)
+            return set(self._pairs)
+
+        for axis in range(3):
+            owners = self._owners[axis]
+            kinds = np.array(self._kinds[axis], dtype=np.int64)
+            owner_rows = row_of[np.array(owners, dtype=np.int64)]
+
+            # Refresh the values of the existing endpoints, new bodies are appended above everything
+            values = np.where(kinds == self._LOWER, lower[owner_rows, axis], upper[owner_rows, axis]).tolist()
+            for cid in added:
+                values += [lower[rows[cid], axis], upper[rows[cid], axis]]
+                owners += [cid, cid]
+                self._kinds[axis] += [self._LOWER, self._UPPER]
+            self._values[axis] = values
+
+            self._sort(axis)
+
+        return set(self._pairs)
+
+    def _rebuild(self, ids: np.ndarray, lower: np.ndarray, upper: np.ndarray):
+        """ Sort all endpoints at once and count the overlapping axes of every pair from scratch """
+        n = len(ids)
+        kinds = np.r_[np.full(n, self._LOWER), np.full(n, self._UPPER)]
+        keys = []
+        amounts = []
+        for axis in range(3):
+            values = np.r_[lower[:, axis], upper[:, axis]]
+            order = np.lexsort((kinds, values))
+            self._values[axis] = values[order].tolist()
+            self._owners[axis] = np.r_[ids, ids][order].tolist()
+            self._kinds[axis] = kinds[order].tolist()
+
+            # Pairs whose intervals intersect including touching, lower after lower up to the upper of the first
+            by_lower = np.argsort(lower[:, axis], kind='stable')
+            sorted_lower = lower[by_lower, axis]
+            ends = np.searchsorted(sorted_lower, upper[by_lower, axis], side='right')
+            first = by_lower[np.repeat(np.arange(n), np.maximum(ends - np.arange(n) - 1, 0))]
+            second = by_lower[ranges(np.arange(n) + 1, np.maximum(ends, np.arange(n) + 1))]
+
+            # Same as the swaps count: lower of one before upper of the other, for both, minus 1
+            rank = np.empty(2 * n, dtype=np.int64)
+            rank[order] = np.arange(2 * n)
+            amount = (rank[first] < rank[n + second]).astype(np.int64) + (rank[second] < rank[n + first]) - 1
+            keys.append(np.minimum(ids[first], ids[second]) << 32 | np.maximum(ids[first], ids[second]))
+            amounts.append(amount)
+
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate(amounts), minlength=len(keys)).astype(np.int64)
+        used = counts != 0
+        self._counts = dict(zip(keys[used].tolist(), counts[used].tolist()))
+        self._pairs = set(keys[counts == 3].tolist())
+
+    def _sort(self, axis: int):
+        """ Insertion sort of the endpoints of an axis, tracking overlaps on every swap """
+        values = self._values[axis]
+        owners = self._owners[axis]
+        kinds = self._kinds[axis]
+        if len(values) < 2:
+            return
+
+        # Only endpoints out of order with their predecessor have to move. After moving one, its successor is compared
+        # against the largest value so far, so it's checked too
+        v = np.array(values)
+        k = np.array(kinds)
+        unsorted = np.flatnonzero((v[1:] < v[:-1]) | ((v[1:] == v[:-1]) & (k[1:] < k[:-1]))) + 1
+
+        last = 0
+        for start in unsorted.tolist():
+            i = max(start, last)
+            while i < len(values) and (values[i], kinds[i]) < (values[i - 1], kinds[i - 1]):
+                self._insert(i, values, owners, kinds)
+                i += 1
+            last = i
+
+    def _insert(self, i: int, values: list[float], owners: list[int], kinds: list[int]):
+        value, owner, kind = values[i], owners[i], kinds[i]
+        j = i
+        while j > 0 and (value, kind) < (values[j - 1], kinds[j - 1]):
+            other = owners[j - 1]
+            other_kind = kinds[j - 1]
+            if other != owner and other_kind != kind:
+                # Lower passing an upper starts overlapping on this axis, an upper passing a lower stops
+                self._change(pair_key(owner, other), 1 if kind == self._LOWER else -1)
+            values[j] = values[j - 1]
+            owners[j] = other
+            kinds[j] = other_kind
+            j -= 1
+        values[j] = value
+        owners[j] = owner
+        kinds[j] = kind
+
+    def _change(self, key: int, amount: int):
+        count = self._counts.get(key, 0) + amount
+        if count == 3:
+            self._pairs.add(key)
+        elif count == 2 and amount < 0:
+            self._pairs.discard(key)
+
+        if count == 0:
+            del self._counts[key]
+        else:
+            self._counts[key] = count
+
+    def _remove(self, removed: set[int]):
+        for axis in range(3):
+            keep = [i for i, cid in enumerate(self._owners[axis]) if cid not in removed]
+            self._values[axis] = [self._values[axis][i] for i in keep]
+            self._owners[axis] = [self._owners[axis][i] for i in keep]
+            self._kinds[axis] = [self._kinds[axis][i] for i in keep]
+
+        self._counts = {key: count for key, count in self._counts.items() if removed.isdisjoint(unpack_keys(key))}
+        self._pairs = {key for key in self._pairs if removed.isdisjoint(unpack_keys(key))}
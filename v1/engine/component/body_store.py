@@ -0,0 +1,341 @@
+from __future__ import annotations
+import copy
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from v1.engine.util.quaternion import Quaternion
+from v1.engine.util.vector3d import Vector3D
+
+if TYPE_CHECKING:
+    from v1.engine.component.component import Component
+    from v1.engine.component.physical_component import PhysicalComponent
+
+
+class BodyStore:
+    """ State of all physical components as structure of arrays, one contiguous array per field with a row per
+    component: ids (N,), positions (N, 3), velocities (N, 3), rotations (N, 4), forces (N, 3), masses (N,) and
+    sizes (N, 3). Solvers and integrators work on the arrays without striding over the other fields.
+
+    Rows are kept packed, so row i is always one of the first `count` rows of every field. Removing a component moves
+    the last row into the freed row.
+    """
+
+    """ Column layout of a snapshot row, which packs the fields of a component @see BodySnapshot """
+    ID = 0
+    POSITION = slice(1, 4)
+    VELOCITY = slice(4, 7)
+    ROTATION = slice(7, 11)
+    FORCE = slice(11, 14)
+    MASS = 14
+    SIZE = slice(15, 18)
+    WIDTH = 18
+
+    """ Snapshot columns per field, in order of a snapshot row """
+    LAYOUT = {
+        'ids': ID,
+        'positions': POSITION,
+        'velocities': VELOCITY,
+        'rotations': ROTATION,
+        'forces': FORCE,
+        'masses': MASS,
+        'sizes': SIZE,
+    }
+
+    """ Raw state per field, only the first `count` rows are in use """
+    fields: dict[str, np.ndarray]
+
+    """ Amount of rows in use """
+    count: int
+
+    """ Component per row """
+    components: list[PhysicalComponent]
+
+    def __init__(self, capacity: int = 64):
+        self.fields = {name: _allocate(capacity, columns) for name, columns in self.LAYOUT.items()}
+        self.count = 0
+        self.components = []
+
+    @property
+    def capacity(self) -> int:
+        return len(self.fields['ids'])
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.fields['ids'][:self.count]
+
+    @property
+    def positions(self) -> np.ndarray:
+        """ (N, 3) view of positions in meters """
+        return self.fields['positions'][:self.count]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """ (N, 3) view of velocities in m/s """
+        return self.fields['velocities'][:self.count]
+
+    @property
+    def rotations(self) -> np.ndarray:
+        """ (N, 4) view of rotations as quaternion (w, x, y, z) """
+        return self.fields['rotations'][:self.count]
+
+    @property
+    def forces(self) -> np.ndarray:
+        """ (N, 3) view of net forces in Newton """
+        return self.fields['forces'][:self.count]
+
+    @property
+    def masses(self) -> np.ndarray:
+        """ (N,) view of masses in kg """
+        return self.fields['masses'][:self.count]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """ (N, 3) view of sizes in meters """
+        return self.fields['sizes'][:self.count]
+
+    def attach(self, c: PhysicalComponent):
+        """ Move state of component into a new row, component reads and writes through the row afterward """
+        if self.count == self.capacity:
+            self._grow()
+
+        fields, row = self.fields, self.count
+        fields['ids'][row] = c.id
+        fields['positions'][row] = _to_row(c.position)
+        fields['velocities'][row] = _to_row(c.velocity)
+        fields['rotations'][row] = _to_row(c.rotation)
+        fields['forces'][row] = _to_row(c.net_force)
+        fields['masses'][row] = c.mass
+        fields['sizes'][row] = _to_row(c.size)
+
+        c._bodies = self
+        c._index = row
+        self.components.append(c)
+        self.count += 1
+
+    def detach(self, c: PhysicalComponent):
+        """ Move state of component out of the store, the last row takes its place """
+        index = c._index
+        for field in BodyField.fields:
+            c.__dict__[field.local] = field.__get__(c).copy() if field.view is not None else field.__get__(c)
+        c._bodies = None
+        c._index = -1
+
+        last = self.count - 1
+        if index != last:
+            moved = self.components[last]
+            for array in self.fields.values():
+                array[index] = array[last]
+            self.components[index] = moved
+            moved._index = index
+        self.components.pop()
+        self.count -= 1
+
+    def snapshot(self, others: list[Component] = ()) -> BodySnapshot:
+        """ State of all components right now, packed into rows of a single array
+
+        :param others: Components outside of the store to keep along, e.g. the non-physical ones of a simulation
+        """
+        data = np.empty((self.count, self.WIDTH), dtype=np.float64)
+        for name, columns in self.LAYOUT.items():
+            data[:, columns] = self.fields[name][:self.count]
+        return BodySnapshot(data, list(self.components), [copy.copy(c) for c in others])
+
+    def _grow(self):
+        for name, array in self.fields.items():
+            grown = np.zeros((2 * len(array),) + array.shape[1:], dtype=np.float64)
+            grown[:self.count] = array[:self.count]
+            self.fields[name] = grown
+
+
+class BodySnapshot:
+    """ Copy of the state of a BodyStore at one moment, with the component of every row
+
+    The fields of a component are packed into a single row, as storages write them @see BodyStore.LAYOUT
+    """
+
+    """ (N, BodyStore.WIDTH) rows """
+    data: np.ndarray
+
+    """ Component per row, their state may have changed since """
+    components: list[PhysicalComponent]
+
+    """ Copies of components without a row, taken with the snapshot """
+    others: list[Component]
+
+    def __init__(self, data: np.ndarray, components: list[PhysicalComponent], others: list[Component] = None):
+        self.data = data
+        self.components = components
+        self.others = others if others is not None else []
+
+    def to_frame(self) -> dict[int, Component]:
+        """ Detached copies of the components with the state of the snapshot, and the other components, in order of
+        id as a simulation keeps them { component_id: Component }
+        """
+        frame = {c.id: c for c in self.others}
+        for c, row in zip(self.components, self.data):
+            detached = c.__class__.__new__(c.__class__)
+            detached.__dict__.update(c.__dict__)
+            detached._bodies = None
+            detached._index = -1
+            for field in BodyField.fields:
+                detached.__dict__[field.local] = field.from_row(row)
+            frame[detached.id] = detached
+        return dict(sorted(frame.items()))
+
+    def interpolate(self, later: BodySnapshot, fraction: float) -> BodySnapshot:
+        """ State fraction of the way from this snapshot to a later one, linear and with normalized rotations
+
+        Components added or removed in between leave nothing to interpolate, the later state is returned then.
+        """
+        if len(self.components) != len(later.components) or \
+                any(a is not b for a, b in zip(self.components, later.components)):
+            return later
+
+        data = self.data + (later.data - self.data) * fraction
+        rotations = data[:, BodyStore.ROTATION]
+        norms = np.linalg.norm(rotations, axis=1, keepdims=True)
+        rotations /= np.where(norms > 0, norms, 1)
+        return BodySnapshot(data, later.components, later.others)
+
+
+class Vector3DView(Vector3D):
+    """ Vector3D reading and writing through a row of a BodyStore. Do not keep a view around while components are
+    added or removed, as rows may move.
+    """
+
+    def __init__(self, row: np.ndarray):
+        self.__dict__['_row'] = row
+
+    @property
+    def x(self) -> float:
+        return float(self._row[0])
+
+    @x.setter
+    def x(self, value: float):
+        self._row[0] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._row[1])
+
+    @y.setter
+    def y(self, value: float):
+        self._row[1] = value
+
+    @property
+    def z(self) -> float:
+        return float(self._row[2])
+
+    @z.setter
+    def z(self, value: float):
+        self._row[2] = value
+
+    def copy(self) -> Vector3D:
+        return Vector3D(self.x, self.y, self.z)
+
+    def __reduce__(self):
+        return Vector3D, (self.x, self.y, self.z)
+
+
+class QuaternionView(Quaternion):
+    """ Quaternion reading and writing through a row of a BodyStore, @see Vector3DView """
+
+    def __init__(self, row: np.ndarray):
+        self.__dict__['_row'] = row
+
+    @property
+    def w(self) -> float:
+        return float(self._row[0])
+
+    @w.setter
+    def w(self, value: float):
+        self._row[0] = value
+
+    @property
+    def x(self) -> float:
+        return float(self._row[1])
+
+    @x.setter
+    def x(self, value: float):
+        self._row[1] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._row[2])
+
+    @y.setter
+    def y(self, value: float):
+        self._row[2] = value
+
+    @property
+    def z(self) -> float:
+        return float(self._row[3])
+
+    @z.setter
+    def z(self, value: float):
+        self._row[3] = value
+
+    def copy(self) -> Quaternion:
+        return Quaternion(self.w, self.x, self.y, self.z)
+
+    def __reduce__(self):
+        return Quaternion, (self.w, self.x, self.y, self.z)
+
+
+class BodyField:
+    """ Attribute of a PhysicalComponent that lives in the BodyStore once attached, and on the instance before """
+
+    """ All fields, used for detaching """
+    fields: list[BodyField] = []
+
+    def __init__(self, name: str, view: type[Vector3DView] | type[QuaternionView] | None = None):
+        """ :param name: Field of the BodyStore, e.g. positions """
+        self.name = name
+        self.column = BodyStore.LAYOUT[name]
+        self.view = view
+        self.fields.append(self)
+
+    def __set_name__(self, owner, name: str):
+        self.local = '_' + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        bodies = instance._bodies
+        if bodies is None:
+            return instance.__dict__[self.local]
+
+        if self.view is None:
+            return float(bodies.fields[self.name][instance._index])
+        return self.view(bodies.fields[self.name][instance._index])
+
+    def __set__(self, instance, value):
+        bodies = instance._bodies
+        if bodies is None:
+            instance.__dict__[self.local] = value
+            return
+
+        bodies.fields[self.name][instance._index] = _to_row(value)
+
+    def from_row(self, row: np.ndarray):
+        """ Detached value of this field in a snapshot row """
+        if self.view is None:
+            return float(row[self.column])
+        return self.view(row[self.column]).copy()
+
+
+def _allocate(capacity: int, columns: int | slice) -> np.ndarray:
+    """ Rows of a field with the width of its snapshot columns """
+    if isinstance(columns, int):
+        return np.zeros(capacity, dtype=np.float64)
+    return np.zeros((capacity, columns.stop - columns.start), dtype=np.float64)
+
+
+def _to_row(value: Vector3D | Quaternion | float):
+    if isinstance(value, Quaternion):
+        return value.w, value.x, value.y, value.z
+    if isinstance(value, Vector3D):
+        return value.x, value.y, value.z
+    return value
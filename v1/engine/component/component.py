@@ -31,3 +31,7 @@ class Component:
         self.size = size
         self.position = position
         self.rotation = rotation
+
+    def to_dict(self) -> dict:
+        """ Constructor arguments describing the component, used for serialization """
+        return dict(self.__dict__)
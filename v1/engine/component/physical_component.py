@@ -1,5 +1,7 @@
+from __future__ import annotations
 from math import atan2
 
+from v1.engine.component.body_store import BodyField, BodyStore, QuaternionView, Vector3DView
 from v1.engine.component.component import Component
 from v1.engine.util.angle3d import Angle3D
 from v1.engine.util.quaternion import Quaternion
@@ -7,13 +9,27 @@ from v1.engine.util.vector3d import Vector3D
 
 
 class PhysicalComponent(Component):
-    """ Physical component """
+    """ Physical component
+
+    Position, velocity, rotation, net_force, mass and size live in the BodyStore of the simulation once the component
+    is added, reading them returns a view on its row of the field.
+    """
+
+    """ BodyStore and row holding the state, None until added to a simulation """
+    _bodies: BodyStore | None = None
+    _index: int = -1
+
+    """ Position, rotation and size of Component, backed by the BodyStore """
+    position = BodyField('positions', Vector3DView)
+    rotation = BodyField('rotations', QuaternionView)
+    size = BodyField('sizes', Vector3DView)
 
     """ Mass in kg """
-    mass: float
+    mass: float = BodyField('masses')
 
     """ Force in Newton, resetted every frame for now """
-    net_force: Vector3D  # TODO: Not sure about this, no info about where the exact force is applied.
+    # TODO: Not sure about this, no info about where the exact force is applied.
+    net_force: Vector3D = BodyField('forces', Vector3DView)
     # Maybe list[{force: float, direction: Angle3D, location: Vector3D (from component origin)}] or something
 
     """ Center of Mass (reference: component origin) """
@@ -23,7 +39,7 @@ class PhysicalComponent(Component):
     cop: Vector3D
 
     """ Velocity in m/s (reference: origin) """
-    velocity: Vector3D
+    velocity: Vector3D = BodyField('velocities', Vector3DView)
 
     """ Angular velocity in radians per second (reference: component origin) """
     angular_velocity: Angle3D
@@ -57,6 +73,22 @@ class PhysicalComponent(Component):
         self.angular_velocity = angular_velocity
         self.c_drag = c_drag
 
+    def to_dict(self) -> dict:
+        return {
+            'id': getattr(self, 'id', None),
+            'name': self.name,
+            'size': _copy(self.size),
+            'position': _copy(self.position),
+            'rotation': _copy(self.rotation),
+            'mass': self.mass,
+            'net_force': _copy(self.net_force),
+            'com': self.com,
+            'cop': self.cop,
+            'velocity': _copy(self.velocity),
+            'angular_velocity': self.angular_velocity,
+            'c_drag': self.c_drag,
+        }
+
     def direction(self) -> Angle3D:
         x_abs = abs(self.velocity.x)
         y_abs = abs(self.velocity.y)
@@ -79,3 +111,8 @@ class PhysicalComponent(Component):
 
     def aoa(self) -> Angle3D:
         return self.rotation.euler_angles() - self.direction()
+
+
+def _copy(value):
+    """ Detach value from the BodyStore """
+    return value.copy() if isinstance(value, (Vector3DView, QuaternionView)) else value
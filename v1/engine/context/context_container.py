@@ -9,7 +9,10 @@ CType = TypeVar('CType', bound=Context)
 class ContextContainer:
     """ State storage across listeners """
 
-    container: dict[str, Context] = {}
+    container: dict[str, Context]
+
+    def __init__(self):
+        self.container = {}
 
     def get(self, ctype: Type[CType]) -> CType:
         return self.container[str(ctype)]
@@ -0,0 +1,32 @@
+from v1.engine.collision.broadphase import Broadphase
+from v1.engine.collision.sweep_and_prune import SweepAndPrune
+from v1.engine.context.context import Context
+from v1.engine.gravity.batched_gravity import BatchedGravity
+from v1.engine.gravity.gravity_solver import GravitySolver
+from v1.engine.integrator.euler import SemiImplicitEuler
+from v1.engine.integrator.integrator import Integrator
+
+
+class PhysicsContext(Context):
+    """ Configuration of the PhysicsListener, pass one to Simulation to change the defaults """
+
+    """ Solver computing gravity between all physical components, exact: PairwiseGravity, BatchedGravity or
+    ParallelGravity on multiple cores, approximate for large amounts of components: BarnesHutGravity or FMMGravity
+    """
+    gravity: GravitySolver
+
+    """ Scheme advancing positions and velocities every frame: SemiImplicitEuler (default), Leapfrog, VelocityVerlet or
+    Yoshida4. The symplectic schemes allow a far larger Settings.delta for the same accuracy. BlockTimestep sub-steps
+    only the bodies in close encounters, frames stay at Settings.delta
+    """
+    integrator: Integrator
+
+    """ Finds possible collisions between physical components: SweepAndPrune (default) or SpatialHash for dense swarms
+    of bodies of about the same size
+    """
+    broadphase: Broadphase
+
+    def __init__(self, gravity: GravitySolver = None, integrator: Integrator = None, broadphase: Broadphase = None):
+        self.gravity = gravity if gravity is not None else BatchedGravity()
+        self.integrator = integrator if integrator is not None else SemiImplicitEuler()
+        self.broadphase = broadphase if broadphase is not None else SweepAndPrune()
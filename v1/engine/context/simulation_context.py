@@ -1,8 +1,10 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
+from v1.engine.component.body_store import BodyStore
 from v1.engine.component.component import Component
 from v1.engine.context.context import Context
+from v1.engine.profiler import Profiler
 
 if TYPE_CHECKING:
     from v1.engine.simulation import Simulation
@@ -24,3 +26,11 @@ class SimulationContext(Context):
 
     def get_components(self) -> dict[int, Component]:
         return self.sim.env
+
+    def get_bodies(self) -> BodyStore:
+        """ Get state of all physical components """
+        return self.sim.bodies
+
+    def get_profiler(self) -> Profiler | None:
+        """ Get profiler timing the phases of a loop, None when not profiling """
+        return self.sim.profiler
@@ -0,0 +1,69 @@
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from v1.engine.component.body_store import BodySnapshot
+from v1.engine.settings import Settings
+from v1.engine.simulation import Simulation
+
+""" Builds the configured simulation of a run from its number, e.g. with the number as random seed """
+Build = Callable[[int], Simulation]
+
+""" Output of a finished simulation, returned to the main process """
+Summary = Callable[[Simulation], object]
+
+
+def final_state(sim: Simulation) -> BodySnapshot:
+    """ State of the bodies at the end of a run """
+    return sim.bodies.snapshot()
+
+
+class Ensemble:
+    """ Runs many independent simulations, each in its own process of a pool
+
+    build and summary are sent to the worker processes, so they have to be picklable: functions defined at module
+    level. Every run starts with the Settings of the main process at the time of calling run, whatever runs before it
+    in the same worker changed. Give each run its own storage name in build, storages of runs write next to each other.
+    """
+
+    build: Build
+    summary: Summary
+
+    """ Worker processes, amount of cores by default """
+    processes: int
+
+    """ Whether to hide what runs print """
+    quiet: bool
+
+    def __init__(self, build: Build, summary: Summary = final_state, processes: int | None = None, quiet: bool = True):
+        self.build = build
+        self.summary = summary
+        self.processes = processes or os.cpu_count() or 1
+        self.quiet = quiet
+
+    def run(self, runs: int) -> list[object]:
+        """ Summaries of runs 0 to runs, in order of run """
+        if runs < 0:
+            raise ValueError(f'Amount of runs must not be negative, not {runs}')
+        if runs == 0:
+            return []
+
+        settings = {k: v for k, v in vars(Settings).items() if not k.startswith('_')}
+        with ProcessPoolExecutor(min(self.processes, runs)) as executor:
+            return list(executor.map(
+                _run, [(self.build, self.summary, settings, i, self.quiet) for i in range(runs)], chunksize=1,
+            ))
+
+
+def _run(arguments: tuple[Build, Summary, dict, int, bool]) -> object:
+    build, summary, settings, i, quiet = arguments
+    for k, v in settings.items():
+        setattr(Settings, k, v)
+
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+        sim = build(i)
+        sim.start()
+    return summary(sim)
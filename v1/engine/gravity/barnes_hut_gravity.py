@@ -0,0 +1,165 @@
+import numpy as np
+
+from v1.engine.gravity.gravity_solver import GravitySolver
+from v1.engine.gravity.octree import Octree, ranges
+
+
+class BarnesHutGravity(GravitySolver):
+    """ Approximate gravity with the Barnes-Hut algorithm, O(n log n)
+
+    Every frame an octree is built over all bodies. A node is used as a single body (its multipole) when it's seen under
+    an angle smaller than theta, so width / distance < theta, otherwise its children are inspected. Bodies walk the tree
+    per leaf, using the distance to the closest body of the leaf, and all leaves walk at once: the walk keeps
+    (leaf, node) pairs and splits them up level by level.
+
+    Bodies at distance 0 of each other do not pull on each other, as there's no direction to pull in.
+    """
+
+    """ Opening angle, 0 equals the exact solution, larger is faster but less accurate """
+    theta: float
+
+    """ Add quadrupole moments to the multipole of a node, more accurate for the same theta """
+    quadrupole: bool
+
+    """ Max bodies in a leaf, bodies in a leaf are summed directly """
+    leaf_size: int
+
+    """ Bodies walking the tree at once (roughly), bounds memory of the walk """
+    chunk_size: int
+
+    def __init__(self, theta: float = 0.5, quadrupole: bool = False, leaf_size: int = 16, chunk_size: int = 4096):
+        self.theta = theta
+        self.quadrupole = quadrupole
+        self.leaf_size = leaf_size
+        self.chunk_size = chunk_size
+
+    def apply(self, positions: np.ndarray, masses: np.ndarray, forces: np.ndarray, targets: np.ndarray = None):
+        n = len(positions)
+        if n < 2:
+            return
+
+        tree = Octree(positions, masses, self.leaf_size, self.quadrupole)
+        sorted_positions = positions[tree.order]
+        sorted_masses = masses[tree.order]
+
+        # Bodies walk the tree per leaf, so the walk costs per leaf instead of per body
+        leaves = np.flatnonzero(tree.is_leaf())
+        leaves = leaves[np.argsort(tree.start[leaves])]
+        leaf_starts = tree.start[leaves]
+        lower = np.minimum.reduceat(sorted_positions, leaf_starts)
+        upper = np.maximum.reduceat(sorted_positions, leaf_starts)
+
+        if targets is not None:
+            # Only leaves containing a target walk the tree
+            rank = np.empty(n, dtype=np.int64)
+            rank[tree.order] = np.arange(n)
+            used = np.unique(np.searchsorted(leaf_starts, rank[targets], side='right') - 1)
+            leaves, lower, upper = leaves[used], lower[used], upper[used]
+
+        accelerations = np.zeros((n, 3))
+        groups_per_chunk = max(1, self.chunk_size // self.leaf_size)
+        for start in range(0, len(leaves), groups_per_chunk):
+            chunk = slice(start, start + groups_per_chunk)
+            self._walk(tree, sorted_positions, sorted_masses, leaves[chunk], lower[chunk], upper[chunk], accelerations)
+
+        if targets is not None:
+            forces[targets] += accelerations[rank[targets]] * masses[targets, None]
+            return
+        forces[tree.order] += accelerations * sorted_masses[:, None]
+
+    def _walk(self, tree: Octree, positions: np.ndarray, masses: np.ndarray, groups: np.ndarray, lower: np.ndarray,
+              upper: np.ndarray, out: np.ndarray):
+        """ Add acceleration on the bodies of groups (leaves) to out, lower and upper bound the bodies of a group """
+        # One gather per step is a lot cheaper than one per attribute: center of mass, center, half size
+        nodes = np.concatenate([tree.com, tree.center, tree.half_size[:, None]], axis=1)
+
+        pair_groups = np.arange(len(groups))
+        pair_nodes = np.zeros(len(groups), dtype=np.int64)  # All start at the root
+
+        while len(pair_groups) > 0:
+            node = nodes[pair_nodes]
+            group_lower = lower[pair_groups]
+            group_upper = upper[pair_groups]
+
+            # Distance from center of mass to the closest point of the group, valid for all bodies in the group
+            closest = np.clip(node[:, 0:3], group_lower, group_upper)
+            gap = node[:, 0:3] - closest
+            distance = np.sqrt(np.einsum('ij,ij->i', gap, gap))
+
+            # A group overlapping a node always opens it, otherwise bodies could pull on themselves
+            half_size = node[:, 6]
+            overlap = np.all(
+                (group_lower <= node[:, 3:6] + half_size[:, None]) & (group_upper >= node[:, 3:6] - half_size[:, None]),
+                axis=1,
+            )
+            accept = ~overlap & (2 * half_size < self.theta * distance)
+
+            # Far away nodes act as a single body
+            if accept.any():
+                bodies, counts = self._expand(tree, groups[pair_groups[accept]])
+                accepted_nodes = pair_nodes[accept]
+                diff = np.repeat(tree.com[accepted_nodes], counts, axis=0) - positions[bodies]
+                acceleration = self._multipole(
+                    np.repeat(tree.mass[accepted_nodes], counts),
+                    np.repeat(tree.quadrupole[accepted_nodes], counts, axis=0) if self.quadrupole else None,
+                    diff,
+                    np.sqrt(np.einsum('ij,ij->i', diff, diff)),
+                )
+                for axis in range(3):
+                    out[:, axis] += np.bincount(bodies, weights=acceleration[:, axis], minlength=len(positions))
+
+            # Leaves which are too close are summed directly
+            opened = ~accept
+            leaf = opened & (tree.child_count[pair_nodes] == 0)
+            if leaf.any():
+                bodies, counts = self._expand(tree, groups[pair_groups[leaf]])
+                self._direct(tree, positions, masses, bodies, np.repeat(pair_nodes[leaf], counts), out)
+
+            # Other nodes are split into their children
+            split = opened & ~leaf
+            split_nodes = pair_nodes[split]
+            counts = tree.child_count[split_nodes]
+            pair_groups = np.repeat(pair_groups[split], counts)
+            pair_nodes = ranges(tree.child_first[split_nodes], tree.child_first[split_nodes] + counts)
+
+    @staticmethod
+    def _expand(tree: Octree, groups: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """ Bodies of every group concatenated and the amount of bodies per group """
+        return ranges(tree.start[groups], tree.end[groups]), tree.end[groups] - tree.start[groups]
+
+    def _multipole(self, mass: np.ndarray, quadrupole: np.ndarray | None, diff: np.ndarray,
+                   distance: np.ndarray) -> np.ndarray:
+        """ Acceleration towards nodes, diff and distance are from the body to the center of mass of the node """
+        # Same clamp as the exact solvers, a minimum of 1 meter
+        limited_distance = np.maximum(distance, 1.0)
+        acceleration = (self.G * mass / limited_distance ** 2 / distance)[:, None] * diff
+
+        if quadrupole is not None:
+            # Gradient of the quadrupole term of the potential, with r pointing from the center of mass to the body
+            q = quadrupole
+            r = -diff
+            qr = np.stack([
+                q[:, 0] * r[:, 0] + q[:, 3] * r[:, 1] + q[:, 4] * r[:, 2],
+                q[:, 3] * r[:, 0] + q[:, 1] * r[:, 1] + q[:, 5] * r[:, 2],
+                q[:, 4] * r[:, 0] + q[:, 5] * r[:, 1] + q[:, 2] * r[:, 2],
+            ], axis=1)
+            rqr = np.einsum('ij,ij->i', r, qr)
+            acceleration += self.G * (qr / distance[:, None] ** 5 - 2.5 * (rqr / distance ** 7)[:, None] * r)
+
+        return acceleration
+
+    def _direct(self, tree: Octree, positions: np.ndarray, masses: np.ndarray, bodies: np.ndarray, leaves: np.ndarray,
+                out: np.ndarray):
+        """ Add acceleration of every body in leaves on bodies """
+        counts = tree.end[leaves] - tree.start[leaves]
+        targets = np.repeat(bodies, counts)
+        sources = ranges(tree.start[leaves], tree.end[leaves])
+
+        diff = positions[sources] - positions[targets]
+        distance = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        limited_distance = np.maximum(distance, 1.0)
+        scale = np.divide(self.G * masses[sources] / limited_distance ** 2, distance, out=np.zeros_like(distance),
+                          where=distance != 0)
+
+        for axis in range(3):
+            out[:, axis] += np.bincount(targets, weights=scale * diff[:, axis], minlength=len(positions))
@@ -0,0 +1,76 @@
+import numpy as np
+
+from v1.engine.gravity.gravity_solver import GravitySolver
+from v1.engine.gravity.pairwise_gravity import PairwiseGravity
+
+
+class BatchedGravity(GravitySolver):
+    """ Exact gravity computed for all pairs at once with numpy
+
+    Pairs are computed in tiles of block_size x block_size bodies, so memory stays bounded for large N. Every pair is
+    computed from both sides, which costs double the flops but avoids scattering forces back.
+    """
+
+    """ Bodies per side of a tile, a tile takes about block_size**2 * 80 bytes """
+    block_size: int
+
+    def __init__(self, block_size: int = 512):
+        self.block_size = block_size
+        self._fallback = PairwiseGravity()
+
+    def apply(self, positions: np.ndarray, masses: np.ndarray, forces: np.ndarray, targets: np.ndarray = None):
+        if targets is None:
+            targets = np.arange(len(positions))
+        gravity = np.zeros((len(targets), 3))
+
+        # Per axis rows are contiguous, which is a lot faster than broadcasting over (N, 3)
+        axes = np.ascontiguousarray(positions.T)
+
+        if not self.accumulate(axes, masses, targets, gravity):
+            # Overlapping bodies depend on the net force applied so far, which is inherently sequential. This is
+            # very rare, so simply let the exact pairwise path handle this frame
+            self._fallback.apply(positions, masses, forces, targets)
+            return
+
+        forces[targets] += gravity
+
+    def accumulate(self, axes: np.ndarray, masses: np.ndarray, targets: np.ndarray, out: np.ndarray) -> bool:
+        """ Add gravity of all bodies on targets to out, tile by tile. Returns False if overlapping bodies were found,
+        out is incomplete then. Lets ParallelGravity compute a part of the targets per process.
+
+        :param axes: (3, N) positions per axis
+        :param out: (len(targets), 3) gravity per target
+        """
+        for start in range(0, len(targets), self.block_size):
+            chunk = slice(start, start + self.block_size)
+            if not self._accumulate(axes, masses, targets[chunk], out[chunk]):
+                return False
+        return True
+
+    def _accumulate(self, axes: np.ndarray, masses: np.ndarray, targets: np.ndarray, out: np.ndarray) -> bool:
+        """ @see accumulate, for at most block_size targets """
+        n = axes.shape[1]
+        target_axes = axes[:, targets, None]
+        target_masses = masses[targets, None]
+
+        for other_start in range(0, n, self.block_size):
+            other_stop = min(other_start + self.block_size, n)
+
+            # Translation from targets to others, (targets, others) per axis
+            pos_diff = [axes[axis, None, other_start:other_stop] - target_axes[axis] for axis in range(3)]
+            distance = np.sqrt(pos_diff[0] ** 2 + pos_diff[1] ** 2 + pos_diff[2] ** 2)
+
+            # Distance is only 0 for a body with itself, unless bodies overlap
+            zeros = np.count_nonzero(distance == 0)
+            if zeros != np.count_nonzero((targets >= other_start) & (targets < other_stop)):
+                return False
+
+            # Same clamp as the pairwise path, a minimum of 1 meter
+            limited_distance = np.maximum(distance, 1.0)
+            gravity_force = self.G * target_masses * masses[None, other_start:other_stop] / limited_distance ** 2
+
+            scale = np.divide(gravity_force, distance, out=np.zeros_like(distance), where=distance != 0)
+            for axis in range(3):
+                out[:, axis] += (scale * pos_diff[axis]).sum(axis=1)
+
+        return True
@@ -0,0 +1,325 @@
+import math
+from itertools import product
+
+import numpy as np
+
+from v1.engine.gravity.batched_gravity import BatchedGravity
+from v1.engine.gravity.gravity_solver import GravitySolver
+from v1.engine.gravity.octree import ranges
+
+
+class FMMGravity(GravitySolver):
+    """ Approximate gravity with the Fast Multipole Method, O(n)
+
+    Bodies are binned in a uniform grid of 8**level leaf cells. Every cell gets a Cartesian multipole expansion of its
+    mass (P2M), merged upward into the coarser levels (M2M). Well separated cells on the same level translate their
+    multipoles into local expansions of each other (M2L), which are pushed down to the leaves (L2L) and evaluated at
+    every body (L2P). Bodies in neighbouring leaf cells are summed directly (P2P).
+
+    On a uniform grid every M2L with the same cell offset is the same linear map, so a level costs one matrix product
+    per offset over all cells at once. The grid is not adaptive, so strongly clustered bodies end up in few leaf cells,
+    which makes the direct part more expensive.
+
+    Bodies at distance 0 of each other do not pull on each other, as there's no direction to pull in.
+    """
+
+    """ Highest order of the expansions, higher is more accurate but slower """
+    order: int
+
+    """ Average bodies per leaf cell used to pick the leaf level """
+    leaf_size: int
+
+    """ Deepest leaf level, bounds memory as a level takes 8**level * terms * 16 bytes """
+    max_level: int
+
+    """ Body pairs computed at once in the direct part, bounds memory """
+    chunk_size: int
+
+    def __init__(self, order: int = 4, leaf_size: int = 4, max_level: int = 6, chunk_size: int = 1 << 21):
+        self.order = order
+        self.leaf_size = leaf_size
+        self.max_level = max_level
+        self.chunk_size = chunk_size
+        self._fallback = BatchedGravity()
+
+        # Multi-indexes (a, b, c) with a + b + c <= order, sorted by order
+        self._indexes = [(a, b, c) for total in range(order + 1)
+                         for a in range(total, -1, -1) for b in range(total - a, -1, -1) for c in [total - a - b]]
+        self._lookup = {index: i for i, index in enumerate(self._indexes)}
+
+    def apply(self, positions: np.ndarray, masses: np.ndarray, forces: np.ndarray, targets: np.ndarray = None):
+        n = len(positions)
+        level = min(self.max_level, int(round(math.log(max(n / self.leaf_size, 1), 8))))
+        if level < 2:
+            # No well separated cells, everything would be summed directly
+            self._fallback.apply(positions, masses, forces, targets)
+            return
+
+        lower = positions.min(axis=0)
+        upper = positions.max(axis=0)
+        half = max(float((upper - lower).max()) / 2 * (1 + 1e-12), 1.0)
+        corner = (lower + upper) / 2 - half
+
+        # Bin bodies into leaf cells, sorted so every cell is a contiguous range
+        cells = 1 << level
+        width = 2 * half / cells
+        coords = np.clip(np.floor((positions - corner) / width).astype(np.int64), 0, cells - 1)
+        cell_ids = (coords[:, 0] * cells + coords[:, 1]) * cells + coords[:, 2]
+        order = np.argsort(cell_ids, kind='stable')
+        cell_ids = cell_ids[order]
+        sorted_positions = positions[order]
+        sorted_masses = masses[order]
+        offsets = sorted_positions - (corner + (coords[order] + 0.5) * width)
+
+        multipoles = self._upward(offsets, sorted_masses, cell_ids, level, 2 * half)
+        local = self._downward(multipoles, 2 * half)
+
+        if targets is None:
+            accelerations = self._evaluate(local, offsets, cell_ids)
+            accelerations += self._direct(sorted_positions, sorted_masses, cell_ids, level)
+            forces[order] += accelerations * sorted_masses[:, None]
+            return
+
+        # Expansions are needed for all cells anyway, only L2P and P2P are limited to the targets
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        rows = rank[targets]
+        active = np.zeros(n, dtype=bool)
+        active[rows] = True
+        accelerations = self._evaluate(local, offsets[rows], cell_ids[rows])
+        accelerations += self._direct(sorted_positions, sorted_masses, cell_ids, level, active)[rows]
+        forces[targets] += accelerations * masses[targets, None]
+
+    def _monomials(self, d: np.ndarray, max_order: int = None) -> np.ndarray:
+        """ d**index / index! for all indexes up to max_order, (N, terms) """
+        max_order = self.order if max_order is None else max_order
+        powers = [np.ones((len(d), max_order + 1)) for _ in range(3)]
+        for axis in range(3):
+            for k in range(1, max_order + 1):
+                powers[axis][:, k] = powers[axis][:, k - 1] * d[:, axis] / k
+
+        terms = [index for index in self._indexes if sum(index) <= max_order]
+        return np.stack([powers[0][:, a] * powers[1][:, b] * powers[2][:, c] for a, b, c in terms], axis=1)
+
+    def _derivatives(self, r: np.ndarray) -> np.ndarray:
+        """ All derivatives of 1/|r| up to order, (N, terms)
+
+        Follows from applying d^m to r**2 * d_i(1/r) + x_i / r = 0, with m = n - e_i
+        """
+        r2 = np.einsum('ij,ij->i', r, r)
+        out = np.zeros((len(r), len(self._indexes)))
+        out[:, 0] = 1 / np.sqrt(r2)
+
+        for position, n in enumerate(self._indexes[1:], start=1):
+            i = next(axis for axis in range(3) if n[axis] > 0)
+            m = list(n)
+            m[i] -= 1
+
+            total = -r[:, i] * out[:, self._lookup[tuple(m)]]
+            if m[i] > 0:
+                total -= m[i] * out[:, self._lookup[_shift(m, i, -1)]]
+            for j in range(3):
+                if m[j] == 0:
+                    continue
+                total -= 2 * m[j] * r[:, j] * out[:, self._lookup[_shift(_shift(m, j, -1), i, 1)]]
+                if m[j] > 1:
+                    total -= m[j] * (m[j] - 1) * out[:, self._lookup[_shift(_shift(m, j, -2), i, 1)]]
+
+            out[:, position] = total / r2
+
+        return out
+
+    def _upward(self, offsets: np.ndarray, masses: np.ndarray, cell_ids: np.ndarray, level: int,
+                size: float) -> list[np.ndarray]:
+        """ Multipole expansion per cell per level, each (cells, cells, cells, terms)
+
+        :param size: width of the root cell
+        """
+        terms = len(self._indexes)
+        cells = 1 << level
+
+        # P2M, multipoles are sum(m * d**index / index!) around the center of the cell
+        starts = np.flatnonzero(np.r_[True, cell_ids[1:] != cell_ids[:-1]])
+        leaf = np.zeros((cells ** 3, terms))
+        leaf[cell_ids[starts]] = np.add.reduceat(masses[:, None] * self._monomials(offsets), starts)
+        multipoles = [leaf.reshape((cells, cells, cells, terms))]
+
+        # M2M, children are -half or +half of their width away from the center of the parent
+        for child_level in range(level, 2, -1):
+            child_width = size / (1 << child_level)
+            child = multipoles[0]
+            parent = np.zeros((child.shape[0] // 2,) * 3 + (terms,))
+            for parity in product([0, 1], repeat=3):
+                shift = (np.array(parity) - 0.5) * child_width
+                parent += child[parity[0]::2, parity[1]::2, parity[2]::2] @ self._translation(shift, upward=True)
+            multipoles.insert(0, parent)
+
+        # Level 2 first, levels 0 and 1 are never used
+        return multipoles
+
+    def _downward(self, multipoles: list[np.ndarray], size: float) -> np.ndarray:
+        """ Local expansion per leaf cell, (cells, cells, cells, terms)
+
+        :param size: width of the root cell
+        """
+        local = None
+        for level, multipole in enumerate(multipoles, start=2):
+            cells = multipole.shape[0]
+            width = size / cells
+
+            # L2L, push the local expansion of the parent down to its children
+            level_local = np.zeros_like(multipole)
+            if local is not None:
+                for parity in product([0, 1], repeat=3):
+                    shift = (np.array(parity) - 0.5) * width
+                    translation = self._translation(shift, upward=False)
+                    level_local[parity[0]::2, parity[1]::2, parity[2]::2] += local @ translation
+
+            # M2L, children of the neighbours of the parent which are not neighbours themselves
+            offsets = [o for o in product(range(-3, 4), repeat=3) if max(abs(v) for v in o) > 1]
+            kernels = self._m2l_kernels(np.array(offsets, dtype=np.float64) * width)
+            for parity in product([0, 1], repeat=3):
+                for offset, kernel in zip(offsets, kernels):
+                    if any(not -2 - p <= o <= 3 - p for p, o in zip(parity, offset)):
+                        continue
+                    targets, sources = _slices(parity, offset, cells)
+                    if targets is None:
+                        continue
+                    level_local[targets] += multipole[sources] @ kernel
+
+            local = level_local
+
+        return local
+
+    def _translation(self, shift: np.ndarray, upward: bool) -> np.ndarray:
+        """ Matrix shifting an expansion by shift, (terms, terms)
+
+        Upward (M2M): M'[a] = sum(M[b] * shift**(a - b) / (a - b)!) for b <= a
+        Downward (L2L): L'[b] = sum(L[a] * shift**(a - b) / (a - b)!) for b <= a
+        """
+        terms = len(self._indexes)
+        monomials = self._monomials(shift[None])[0]
+        matrix = np.zeros((terms, terms))
+        for a, index_a in enumerate(self._indexes):
+            for b, index_b in enumerate(self._indexes):
+                diff = tuple(x - y for x, y in zip(index_a, index_b))
+                if min(diff) < 0:
+                    continue
+                if upward:
+                    matrix[b, a] = monomials[self._lookup[diff]]
+                else:
+                    matrix[a, b] = monomials[self._lookup[diff]]
+        return matrix
+
+    def _m2l_kernels(self, separations: np.ndarray) -> np.ndarray:
+        """ Matrices translating a multipole into a local expansion, (offsets, terms, terms)
+
+        L[b] = sum((-1)**|a| * M[a] * D[a + b](target - source)) for |a| + |b| <= order, separations are source - target
+        """
+        derivatives = self._derivatives(-separations)
+        kernels = np.zeros((len(separations), len(self._indexes), len(self._indexes)))
+        for a, index_a in enumerate(self._indexes):
+            sign = -1 if sum(index_a) % 2 else 1
+            for b, index_b in enumerate(self._indexes):
+                index = tuple(x + y for x, y in zip(index_a, index_b))
+                if sum(index) <= self.order:
+                    kernels[:, a, b] = sign * derivatives[:, self._lookup[index]]
+        return kernels
+
+    def _evaluate(self, local: np.ndarray, offsets: np.ndarray, cell_ids: np.ndarray) -> np.ndarray:
+        """ L2P, acceleration is G * gradient of the local expansion """
+        local = local.reshape((-1, local.shape[-1]))
+        lower = [index for index in self._indexes if sum(index) < self.order]
+        gradient = [[self._lookup[_shift(index, axis, 1)] for index in lower] for axis in range(3)]
+
+        accelerations = np.zeros((len(offsets), 3))
+        step = max(1, self.chunk_size // len(self._indexes))
+        for start in range(0, len(offsets), step):
+            chunk = slice(start, start + step)
+            monomials = self._monomials(offsets[chunk], self.order - 1)
+            coefficients = local[cell_ids[chunk]]
+            for axis in range(3):
+                accelerations[chunk, axis] = self.G * np.einsum('ij,ij->i', monomials, coefficients[:, gradient[axis]])
+        return accelerations
+
+    def _direct(self, positions: np.ndarray, masses: np.ndarray, cell_ids: np.ndarray, level: int,
+                active: np.ndarray = None) -> np.ndarray:
+        """ P2P, acceleration from bodies in the same and neighbouring leaf cells
+
+        :param active: optional mask of bodies, only cells containing an active body are computed
+        """
+        cells = 1 << level
+        n = len(positions)
+        starts = np.flatnonzero(np.r_[True, cell_ids[1:] != cell_ids[:-1]])
+        ends = np.r_[starts[1:], n]
+        occupied = cell_ids[starts]
+
+        # Range of bodies per cell id, empty for empty cells
+        cell_start = np.zeros(cells ** 3, dtype=np.int64)
+        cell_end = np.zeros(cells ** 3, dtype=np.int64)
+        cell_start[occupied] = starts
+        cell_end[occupied] = ends
+
+        if active is not None:
+            used_cells = np.add.reduceat(active, starts) > 0
+            starts, ends, occupied = starts[used_cells], ends[used_cells], occupied[used_cells]
+        coords = np.stack([occupied // (cells * cells), occupied // cells % cells, occupied % cells], axis=1)
+
+        accelerations = np.zeros((n, 3))
+        for offset in product([-1, 0, 1], repeat=3):
+            neighbour = coords + offset
+            valid = np.all((neighbour >= 0) & (neighbour < cells), axis=1)
+            neighbour_ids = (neighbour[valid, 0] * cells + neighbour[valid, 1]) * cells + neighbour[valid, 2]
+            source_starts = cell_start[neighbour_ids]
+            source_counts = cell_end[neighbour_ids] - source_starts
+            used = source_counts > 0
+
+            # Every body of the target cell against every body of the source cell
+            targets = ranges(starts[valid][used], ends[valid][used])
+            per_target = np.repeat(source_counts[used], (ends[valid] - starts[valid])[used])
+            first_source = np.repeat(source_starts[used], (ends[valid] - starts[valid])[used])
+
+            bounds = np.r_[0, np.cumsum(per_target)]
+            chunk_start = 0
+            while chunk_start < len(targets):
+                chunk_stop = int(np.searchsorted(bounds, bounds[chunk_start] + self.chunk_size, side='right')) - 1
+                chunk_stop = max(chunk_stop, chunk_start + 1)
+                chunk = slice(chunk_start, chunk_stop)
+                pair_targets = np.repeat(targets[chunk], per_target[chunk])
+                pair_sources = ranges(first_source[chunk], first_source[chunk] + per_target[chunk])
+                self._pairs(positions, masses, pair_targets, pair_sources, accelerations)
+                chunk_start = chunk_stop
+
+        return accelerations
+
+    def _pairs(self, positions: np.ndarray, masses: np.ndarray, targets: np.ndarray, sources: np.ndarray,
+               out: np.ndarray):
+        diff = positions[sources] - positions[targets]
+        distance = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        # Same clamp as the exact solvers, a minimum of 1 meter
+        limited_distance = np.maximum(distance, 1.0)
+        scale = np.divide(self.G * masses[sources] / limited_distance ** 2, distance, out=np.zeros_like(distance),
+                          where=distance != 0)
+        for axis in range(3):
+            out[:, axis] += np.bincount(targets, weights=scale * diff[:, axis], minlength=len(positions))
+
+
+def _shift(index, axis: int, amount: int) -> tuple:
+    shifted = list(index)
+    shifted[axis] += amount
+    return tuple(shifted)
+
+
+def _slices(parity: tuple, offset: tuple, cells: int) -> tuple[tuple, tuple] | tuple[None, None]:
+    """ Slices of target cells with parity and their source cells at offset, None if there are none """
+    targets = []
+    sources = []
+    for p, o in zip(parity, offset):
+        first = max(0, -((p + o) // 2))  # Smallest k with p + o + 2k >= 0
+        last = (cells - 1 - p - o) // 2  # Largest k with p + o + 2k < cells
+        last = min(last, (cells - 1 - p) // 2)
+        if last < first:
+            return None, None
+        targets.append(slice(p + 2 * first, p + 2 * last + 1, 2))
+        sources.append(slice(p + o + 2 * first, p + o + 2 * last + 1, 2))
+    return tuple(targets), tuple(sources)
@@ -0,0 +1,27 @@
+from abc import abstractmethod
+
+import numpy as np
+
+
+class GravitySolver:
+    """ Computes gravitational forces between all physical components """
+
+    G: float = 6.67430e-11
+
+    @abstractmethod
+    def apply(self, positions: np.ndarray, masses: np.ndarray, forces: np.ndarray, targets: np.ndarray = None):
+        """ Add gravitational force of every body on every other body to forces
+
+        :param positions: (N, 3) positions in meters
+        :param masses: (N,) masses in kg
+        :param forces: (N, 3) net forces in Newton, updated in place
+        :param targets: indexes of the bodies to compute the force on, only their rows of forces are updated. None for
+            all bodies
+        """
+        pass
+
+    def close(self):
+        """ Frees what the solver holds on to between frames, e.g. worker processes. Called when the simulation stops,
+        the solver can still be applied afterwards.
+        """
+        pass
@@ -0,0 +1,187 @@
+import numpy as np
+
+
+class Octree:
+    """ Octree over bodies, built at once with numpy by sorting bodies on their Morton key
+
+    Bodies are sorted so every node covers a contiguous range [start, end) of sorted bodies. Nodes are stored level by
+    level and the children of a node are contiguous, so node data can be aggregated bottom-up with np.add.reduceat.
+    """
+
+    """ Depth of the Morton key, 21 bits per axis fit in 64 bits """
+    MAX_DEPTH = 21
+
+    """ Sorted order of bodies, sorted[i] = original[order[i]] """
+    order: np.ndarray
+
+    """ Per node: range of sorted bodies, level, first child and amount of children (0 for leaves) """
+    start: np.ndarray
+    end: np.ndarray
+    level: np.ndarray
+    child_first: np.ndarray
+    child_count: np.ndarray
+
+    """ Per node: geometric center and half of the width of the cube """
+    center: np.ndarray
+    half_size: np.ndarray
+
+    """ Per node: total mass and center of mass """
+    mass: np.ndarray
+    com: np.ndarray
+
+    """ Per node: traceless quadrupole moment (xx, yy, zz, xy, xz, yz) around the center of mass, None if disabled """
+    quadrupole: np.ndarray | None
+
+    def __init__(self, positions: np.ndarray, masses: np.ndarray, leaf_size: int = 8, quadrupole: bool = False):
+        lower = positions.min(axis=0)
+        upper = positions.max(axis=0)
+        root_center = (lower + upper) / 2
+        # Slightly larger than needed, so bodies on the upper bound still fall inside
+        root_half = max(float((upper - lower).max()) / 2 * (1 + 1e-12), 1.0)
+
+        # Integer coordinates on the finest level and their Morton key
+        cells = 1 << self.MAX_DEPTH
+        coords = np.floor((positions - (root_center - root_half)) / (2 * root_half) * cells).astype(np.int64)
+        coords = np.clip(coords, 0, cells - 1).astype(np.uint64)
+        keys = _spread(coords[:, 0]) << np.uint64(2) | _spread(coords[:, 1]) << np.uint64(1) | _spread(coords[:, 2])
+
+        self.order = np.argsort(keys, kind='stable')
+        keys = keys[self.order]
+        coords = coords[self.order]
+
+        self._build(keys, len(positions), leaf_size)
+
+        level_size = root_half / (1 << self.level)
+        node_coords = coords[self.start] >> (self.MAX_DEPTH - self.level)[:, None].astype(np.uint64)
+        self.half_size = level_size
+        self.center = root_center - root_half + (node_coords.astype(np.float64) * 2 + 1) * level_size[:, None]
+
+        self._moments(positions[self.order], masses[self.order], quadrupole)
+
+    def is_leaf(self) -> np.ndarray:
+        return self.child_count == 0
+
+    def _build(self, keys: np.ndarray, n: int, leaf_size: int):
+        """ Split nodes level by level until they contain at most leaf_size bodies """
+        starts = [np.array([0])]
+        ends = [np.array([n])]
+        child_first = []
+        child_count = []
+        offset = 1  # Node id of first node on next level
+
+        # Sorted indexes of bodies in nodes which are split on the next level
+        open_bodies = np.arange(n) if n > leaf_size else np.array([], dtype=np.int64)
+        open_nodes = np.flatnonzero(ends[0] - starts[0] > leaf_size)
+
+        for level in range(1, self.MAX_DEPTH + 1):
+            first = np.zeros(len(starts[-1]), dtype=np.int64)
+            count = np.zeros(len(starts[-1]), dtype=np.int64)
+            if len(open_bodies) == 0:
+                child_first.append(first)
+                child_count.append(count)
+                break
+
+            # Children are runs of equal key prefixes
+            prefix = keys[open_bodies] >> np.uint64(3 * (self.MAX_DEPTH - level))
+            run_starts = np.flatnonzero(np.r_[True, prefix[1:] != prefix[:-1]])
+            run_ends = np.r_[run_starts[1:], len(open_bodies)]
+            level_starts = open_bodies[run_starts]
+            level_ends = open_bodies[run_ends - 1] + 1
+
+            # Parent of each child, children of a parent are contiguous
+            parents = np.searchsorted(starts[-1][open_nodes], level_starts, side='right') - 1
+            first[open_nodes] = offset + np.searchsorted(parents, np.arange(len(open_nodes)))
+            count[open_nodes] = np.bincount(parents, minlength=len(open_nodes))
+            child_first.append(first)
+            child_count.append(count)
+
+            starts.append(level_starts)
+            ends.append(level_ends)
+            offset += len(level_starts)
+
+            if level == self.MAX_DEPTH:
+                child_first.append(np.zeros(len(level_starts), dtype=np.int64))
+                child_count.append(np.zeros(len(level_starts), dtype=np.int64))
+                break
+
+            open_nodes = np.flatnonzero(level_ends - level_starts > leaf_size)
+            open_bodies = ranges(level_starts[open_nodes], level_ends[open_nodes])
+
+        self.start = np.concatenate(starts)
+        self.end = np.concatenate(ends)
+        self.level = np.concatenate([np.full(len(s), i, dtype=np.int64) for i, s in enumerate(starts)])
+        self.child_first = np.concatenate(child_first)
+        self.child_count = np.concatenate(child_count)
+        self._level_offsets = np.cumsum([0] + [len(s) for s in starts])
+
+    def _moments(self, positions: np.ndarray, masses: np.ndarray, quadrupole: bool):
+        """ Mass, center of mass and optionally second moments per node, leaves first and then bottom-up """
+        nodes = len(self.start)
+        self.mass = np.zeros(nodes)
+        self.com = np.zeros((nodes, 3))
+        second = np.zeros((nodes, 6)) if quadrupole else None
+
+        leaves = np.flatnonzero(self.is_leaf())
+        leaves = leaves[np.argsort(self.start[leaves])]  # Leaves partition the sorted bodies
+        leaf_starts = self.start[leaves]
+        self.mass[leaves] = np.add.reduceat(masses, leaf_starts)
+        self.com[leaves] = np.add.reduceat(masses[:, None] * positions, leaf_starts) / self.mass[leaves, None]
+        if quadrupole:
+            offsets = positions - np.repeat(self.com[leaves], self.end[leaves] - leaf_starts, axis=0)
+            second[leaves] = np.add.reduceat(masses[:, None] * _outer(offsets), leaf_starts)
+
+        # Internal nodes from their children, deepest level first
+        for level in range(len(self._level_offsets) - 2, -1, -1):
+            level_nodes = np.arange(self._level_offsets[level], self._level_offsets[level + 1])
+            parents = level_nodes[self.child_count[level_nodes] > 0]
+            if len(parents) == 0:
+                continue
+
+            first = self.child_first[parents]
+            children = np.arange(first[0], self._level_offsets[level + 2])
+            relative_first = first - first[0]
+            self.mass[parents] = np.add.reduceat(self.mass[children], relative_first)
+            self.com[parents] = np.add.reduceat(
+                self.mass[children, None] * self.com[children], relative_first
+            ) / self.mass[parents, None]
+
+            if quadrupole:
+                # Parallel axis theorem, moment of each child around the center of mass of the parent
+                offsets = self.com[children] - np.repeat(self.com[parents], self.child_count[parents], axis=0)
+                second[parents] = np.add.reduceat(
+                    second[children] + self.mass[children, None] * _outer(offsets), relative_first
+                )
+
+        self.quadrupole = None
+        if quadrupole:
+            trace = second[:, :3].sum(axis=1)
+            self.quadrupole = 3 * second
+            self.quadrupole[:, :3] -= trace[:, None]
+
+
+def _spread(v: np.ndarray) -> np.ndarray:
+    """ Spread 21 bits so there are 2 zero bits between each bit """
+    v = v & np.uint64(0x1fffff)
+    v = (v | v << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    v = (v | v << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    v = (v | v << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    v = (v | v << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    v = (v | v << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return v
+
+
+def _outer(v: np.ndarray) -> np.ndarray:
+    """ Symmetric outer product of (N, 3) vectors as (N, 6): xx, yy, zz, xy, xz, yz """
+    return np.stack([
+        v[:, 0] * v[:, 0], v[:, 1] * v[:, 1], v[:, 2] * v[:, 2],
+        v[:, 0] * v[:, 1], v[:, 0] * v[:, 2], v[:, 1] * v[:, 2],
+    ], axis=1)
+
+
+def ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """ Concatenation of arange(start, end) for every range """
+    lengths = ends - starts
+    if len(lengths) == 0:
+        return np.array([], dtype=np.int64)
+    offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return np.arange(lengths.sum()) + offsets
@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+
+from v1.engine.gravity.gravity_solver import GravitySolver
+
+
+class PairwiseGravity(GravitySolver):
+    """ Exact gravity computed pair by pair in Python, reference for the other solvers """
+
+    def apply(self, positions: np.ndarray, masses: np.ndarray, forces: np.ndarray, targets: np.ndarray = None):
+        # Python floats are a lot faster than numpy scalars for per pair math
+        pos = positions.tolist()
+        mass = masses.tolist()
+        net_forces = forces.tolist()
+
+        if targets is not None:
+            # Only targets receive force, so pairs can't be shared: O(len(targets) * n)
+            ignored = [0.0, 0.0, 0.0]
+            for i in targets.tolist():
+                for j in range(len(pos)):
+                    if j != i:
+                        self._compute_gravity(pos[i], pos[j], mass[i], mass[j], net_forces[i], ignored)
+            forces[targets] = [net_forces[i] for i in targets.tolist()]
+            return
+
+        # Time complexity: O(n**2 / 2)
+        for i in range(len(pos)):
+            for j in range(i + 1, len(pos)):
+                self._compute_gravity(pos[i], pos[j], mass[i], mass[j], net_forces[i], net_forces[j])
+
+        forces[:] = net_forces
+
+    def _compute_gravity(self, c_pos: list[float], other_pos: list[float], c_mass: float, other_mass: float,
+                         c_force: list[float], other_force: list[float]):
+        # Calculate gravity, very accurate but very inefficient
+        #   BarnesHutGravity uses The Barnes-Hut Algorithm, with a tiny loss in accuracy
+        # Right now O(n**2), but we continue if checked, so heavy computation is O(n**2 / 2)
+        # n = number of PhysicalComponents
+
+        # Calculate translation and distance with a minimum of 1 to avoid division errors
+        #   and should be physically impossible, because it would attract more than it's mass allows
+        pos_diff = [other_pos[0] - c_pos[0], other_pos[1] - c_pos[1], other_pos[2] - c_pos[2]]
+        distance = math.sqrt(pos_diff[0] ** 2 + pos_diff[1] ** 2 + pos_diff[2] ** 2)
+        limited_distance = max(1.0, distance)
+
+        # Calculate gravitational force
+        gravity_force = self.G * c_mass * other_mass / limited_distance ** 2
+
+        # Add force to component. If distance is 0, we have a force that's equal in every axes
+        if distance != 0:
+            scale = gravity_force / distance
+            for axis in range(3):
+                force = scale * pos_diff[axis]
+                c_force[axis] += force
+                other_force[axis] += -force
+            return
+
+        # TODO: Rework: @see PhysicalComponent.net_force comment
+        # Distance == 0, so we calculate net force by checking if gravity force is stronger than current net force
+        # If so, we can simply put 0 as the object does not have enough to overcome gravity force
+        # If not, we subtract the gravity_force and the leftover force will be the force applied
+        def _calculate_force(net_force: float):
+            if gravity_force > abs(net_force):
+                return 0
+
+            # Leftover force between net_force and gravity_force in direction of net_force, therefore gravity_force is
+            # converted to - or + to align with net_force (with copysign)
+            return net_force - gravity_force * math.copysign(1, net_force)
+
+        # Apply forces
+        for axis in range(3):
+            c_force[axis] = _calculate_force(c_force[axis])
+            other_force[axis] = _calculate_force(other_force[axis])
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from v1.engine.gravity.batched_gravity import BatchedGravity
+from v1.engine.gravity.gravity_solver import GravitySolver
+
+""" Commands in the header of the shared memory """
+_COMPUTE = 0
+_STOP = 1
+
+""" Seconds between checks whether the other side is still alive while waiting """
+_POLL = 0.1
+
+
+class ParallelGravity(GravitySolver):
+    """ Exact gravity of BatchedGravity with the targets split over a pool of worker processes
+
+    Positions, masses and the resulting gravity live in shared memory, so a frame only copies the arrays in and out of
+    it. Every worker gets a semaphore to start computing and releases a shared one when done. While waiting, the
+    simulation checks whether the workers are still alive, so a crashed worker raises instead of hanging, and idle
+    workers stop once the simulation process is gone. The workers start on the first apply and keep running until
+    close, they are restarted when the amount of bodies outgrows the shared memory.
+    """
+
+    """ Worker processes, amount of cores by default """
+    workers: int
+
+    """ @see BatchedGravity.block_size """
+    block_size: int
+
+    """ Seconds a frame may take before giving up on the workers, None to wait as long as they're alive """
+    timeout: float | None
+
+    def __init__(self, workers: int | None = None, block_size: int = 512, timeout: float | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.block_size = block_size
+        self.timeout = timeout
+        self._capacity = 0
+        self._memory: shared_memory.SharedMemory | None = None
+        self._arrays: dict[str, np.ndarray] = {}
+        self._processes: list[multiprocessing.Process] = []
+        self._start_signals = []
+        self._done = None
+        self._batched = BatchedGravity(block_size)
+
+    def apply(self, positions: np.ndarray, masses: np.ndarray, forces: np.ndarray, targets: np.ndarray = None):
+        if targets is None:
+            targets = np.arange(len(positions))
+        if len(targets) == 0:
+            return
+        if len(positions) > self._capacity:
+            self._start(max(len(positions), 2 * self._capacity))
+
+        n, t = len(positions), len(targets)
+        arrays = self._arrays
+        arrays['positions'][:n] = positions
+        arrays['masses'][:n] = masses
+        arrays['targets'][:t] = targets
+        arrays['header'][:] = [_COMPUTE, n, t]
+
+        for signal in self._start_signals:
+            signal.release()
+        self._wait()
+
+        if not arrays['status'].all():
+            # Overlapping bodies, same as BatchedGravity let the sequential path handle this frame
+            self._batched.apply(positions, masses, forces, targets)
+            return
+        forces[targets] += arrays['gravity'][:t]
+
+    def close(self):
+        """ Stops the workers and frees the shared memory """
+        if self._memory is None:
+            return
+
+        self._arrays['header'][0] = _STOP
+        for signal in self._start_signals:
+            signal.release()
+        for process in self._processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self._arrays = {}
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+        self._processes = []
+        self._start_signals = []
+        self._done = None
+        self._capacity = 0
+
+    def _wait(self):
+        """ Blocks until every worker finished the frame, raises when a worker died or the frame took too long """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        done = 0
+        while done < self.workers:
+            if self._done.acquire(timeout=_POLL):
+                done += 1
+                continue
+
+            dead = [process for process in self._processes if not process.is_alive()]
+            if dead:
+                self.close()
+                raise RuntimeError(f'Gravity worker {dead[0].name} stopped with exit code {dead[0].exitcode}')
+            if deadline is not None and time.monotonic() > deadline:
+                self.close()
+                raise TimeoutError(f'Gravity workers took longer than {self.timeout}s for a frame')
+
+    def _start(self, capacity: int):
+        self.close()
+
+        self._memory = shared_memory.SharedMemory(create=True, size=_size(capacity, self.workers))
+        self._arrays = _arrays(self._memory.buf, capacity, self.workers)
+        self._capacity = capacity
+        self._start_signals = [multiprocessing.Semaphore(0) for _ in range(self.workers)]
+        self._done = multiprocessing.Semaphore(0)
+        self._processes = [
+            multiprocessing.Process(
+                target=_work,
+                args=(self._memory.name, capacity, self.workers, worker, self.block_size, self._start_signals[worker],
+                      self._done),
+                name=f'gravity-{worker}',
+                daemon=True,
+            )
+            for worker in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def __getstate__(self) -> dict:
+        # Workers and shared memory are started again on the first apply
+        return {'workers': self.workers, 'block_size': self.block_size, 'timeout': self.timeout}
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    def __del__(self):
+        self.close()
+
+
+def _layout(capacity: int, workers: int) -> dict[str, tuple[np.dtype, tuple[int, ...]]]:
+    return {
+        'header': (np.int64, (3,)),  # command | amount of bodies | amount of targets
+        'status': (np.int64, (workers,)),  # Per worker 1 if it computed its targets, 0 if bodies overlap
+        'positions': (np.float64, (capacity, 3)),
+        'masses': (np.float64, (capacity,)),
+        'targets': (np.int64, (capacity,)),
+        'gravity': (np.float64, (capacity, 3)),  # Per target
+    }
+
+
+def _size(capacity: int, workers: int) -> int:
+    return sum(int(np.prod(shape)) * 8 for _, shape in _layout(capacity, workers).values())
+
+
+def _arrays(buffer, capacity: int, workers: int) -> dict[str, np.ndarray]:
+    """ Views of the arrays in the shared memory """
+    arrays = {}
+    offset = 0
+    for name, (dtype, shape) in _layout(capacity, workers).items():
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        offset += arrays[name].nbytes
+    return arrays
+
+
+def _work(name: str, capacity: int, workers: int, worker: int, block_size: int, start, done):
+    """ Computes gravity on a contiguous part of the targets every frame, until told to stop """
+    memory = shared_memory.SharedMemory(name=name)
+    arrays = _arrays(memory.buf, capacity, workers)
+    batched = BatchedGravity(block_size)
+    parent = multiprocessing.parent_process()
+
+    while True:
+        if not start.acquire(timeout=_POLL):
+            if parent is not None and not parent.is_alive():
+                break
+            continue
+
+        command, n, t = arrays['header'].tolist()
+        if command == _STOP:
+            break
+
+        part = slice(t * worker // workers, t * (worker + 1) // workers)
+        targets = arrays['targets'][part]
+        gravity = arrays['gravity'][part]
+        gravity[:] = 0
+
+        axes = np.ascontiguousarray(arrays['positions'][:n].T)
+        masses = arrays['masses'][:n]
+        try:
+            ok = batched.accumulate(axes, masses, targets, gravity)
+        except Exception:
+            # The sequential path raises it again in the simulation process
+            ok = False
+        arrays['status'][worker] = ok
+
+        done.release()
+
+    del arrays
+    memory.close()
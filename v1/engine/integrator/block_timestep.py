@@ -0,0 +1,119 @@
+import numpy as np
+
+from v1.engine.integrator.integrator import GravityFunction, Integrator
+
+
+class BlockTimestep(Integrator):
+    """ Per body adaptive steps on power-of-two block levels (Aarseth), kick-drift-kick per body
+
+    A body on level k steps dt / 2**k, so a frame is divided in 2**max_level ticks and a body is only active on the
+    ticks its own step ends on. Active bodies get gravity evaluated (only for them) and are kicked, all bodies are
+    drifted between ticks. Bodies in close encounters are sub-stepped while the rest keeps the frame step, and at the
+    end of every frame all bodies are synchronized again.
+
+    The step of a body follows dt_i = eta * |a| / |da/dt|, the change of acceleration is taken from the last two
+    gravity evaluations of the body. A body moves to a finer level at any of its ticks, but only one level coarser at a
+    time and only when the coarser step is aligned with the ticks.
+    """
+
+    """ Accuracy parameter of the step criterion, smaller is more accurate """
+    eta: float
+
+    """ Finest level, bodies never step smaller than dt / 2**max_level """
+    max_level: int
+
+    """ Level per body after the last step """
+    levels: np.ndarray | None
+
+    """ Gravity evaluations done for the last step, counted per body """
+    evaluations: int
+
+    def __init__(self, eta: float = 0.02, max_level: int = 10):
+        self.eta = eta
+        self.max_level = max_level
+        self.levels = None
+        self.evaluations = 0
+        self._positions = None
+        self._gravity = None
+
+    def step(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray, external: np.ndarray, dt: float,
+             gravity: GravityFunction):
+        n = len(positions)
+        if n == 0:
+            return
+
+        ticks = 1 << self.max_level
+        tick = dt / ticks
+        inverse_masses = 1 / masses[:, None]
+
+        if self._positions is None or not np.array_equal(self._positions, positions):
+            self._start(positions, velocities, inverse_masses, dt, gravity)
+        self.evaluations = 0
+
+        # Opening half kick of every body, bodies are synchronized at the start of a frame
+        step_ticks = ticks >> self.levels
+        next_tick = step_ticks.copy()
+        velocities += (external + self._gravity) * inverse_masses * (step_ticks * tick / 2)[:, None]
+
+        now = 0
+        while now < ticks:
+            following = int(next_tick.min())
+            positions += velocities * ((following - now) * tick)
+            now = following
+
+            active = np.flatnonzero(next_tick == now)
+            forces = np.zeros_like(positions)
+            gravity(positions, forces, active)
+            self.evaluations += len(active)
+            active_gravity = forces[active]
+            active_acceleration = (external[active] + active_gravity) * inverse_masses[active]
+
+            # Closing half kick with the step the bodies were on
+            previous_step = step_ticks[active] * tick
+            velocities[active] += active_acceleration * (previous_step / 2)[:, None]
+
+            jerk = (active_gravity - self._gravity[active]) * inverse_masses[active] / previous_step[:, None]
+            self._gravity[active] = active_gravity
+            self.levels[active] = self._next_levels(
+                active_gravity * inverse_masses[active], jerk, dt, self.levels[active], now
+            )
+
+            # Opening half kick of the next step, at the end of the frame the next frame does this
+            if now < ticks:
+                step_ticks[active] = ticks >> self.levels[active]
+                next_tick[active] = now + step_ticks[active]
+                velocities[active] += active_acceleration * (step_ticks[active] * tick / 2)[:, None]
+
+        self._positions = positions.copy()
+
+    def _start(self, positions: np.ndarray, velocities: np.ndarray, inverse_masses: np.ndarray, dt: float,
+               gravity: GravityFunction):
+        """ Gravity and levels from scratch, the change of acceleration is measured by moving all bodies a tiny step """
+        self._gravity = np.zeros_like(positions)
+        gravity(positions, self._gravity)
+
+        probe = dt / (1 << self.max_level)
+        moved = np.zeros_like(positions)
+        gravity(positions + velocities * probe, moved)
+
+        jerk = (moved - self._gravity) * inverse_masses / probe
+        self.levels = self._levels(self._gravity * inverse_masses, jerk, dt)
+
+    def _levels(self, acceleration: np.ndarray, jerk: np.ndarray, dt: float) -> np.ndarray:
+        """ Level per body with a step of at most eta * |a| / |da/dt| """
+        magnitude = np.sqrt(np.einsum('ij,ij->i', acceleration, acceleration))
+        change = np.sqrt(np.einsum('ij,ij->i', jerk, jerk))
+
+        # Frame steps per body step, bodies without any gravity keep the frame step
+        ratio = np.divide(dt * change, self.eta * magnitude, out=np.zeros_like(magnitude), where=magnitude != 0)
+        with np.errstate(divide='ignore'):
+            levels = np.ceil(np.log2(ratio))
+        return np.clip(levels, 0, self.max_level).astype(np.int64)
+
+    def _next_levels(self, acceleration: np.ndarray, jerk: np.ndarray, dt: float, levels: np.ndarray,
+                     now: int) -> np.ndarray:
+        wanted = np.maximum(self._levels(acceleration, jerk, dt), levels - 1)
+
+        # Coarser steps have to end on the frame boundary, so only coarsen when now is aligned with the coarser step
+        aligned = now % ((1 << self.max_level) >> wanted) == 0
+        return np.where((wanted < levels) & ~aligned, levels, wanted)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from v1.engine.gravity.gravity_solver import GravitySolver
+
+
+def kinetic_energy(velocities: np.ndarray, masses: np.ndarray) -> float:
+    return float(0.5 * np.sum(masses * np.einsum('ij,ij->i', velocities, velocities)))
+
+
+def potential_energy(positions: np.ndarray, masses: np.ndarray, block_size: int = 512) -> float:
+    """ Gravitational potential energy of all pairs, with the same 1 meter clamp as the gravity solvers """
+    n = len(positions)
+    total = 0.0
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        pos_diff = positions[None, :] - positions[start:stop, None]
+        distance = np.maximum(np.sqrt(np.einsum('ijk,ijk->ij', pos_diff, pos_diff)), 1.0)
+        pairs = masses[start:stop, None] * masses[None, :] / distance
+        # Only pairs i < j, so every pair once and not with itself
+        total -= float(np.triu(pairs, k=start + 1).sum())
+    return GravitySolver.G * total
+
+
+def angular_momentum(positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray) -> np.ndarray:
+    """ Total angular momentum around the origin, (3,) """
+    return np.sum(masses[:, None] * np.cross(positions, velocities), axis=0)
+
+
+class DriftReport:
+    """ Tracks drift of total energy and angular momentum relative to the first recorded state """
+
+    def __init__(self):
+        self._energy = None
+        self._momentum = None
+        self.max_energy_drift = 0.0
+        self.max_momentum_drift = 0.0
+
+    def record(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray):
+        energy = kinetic_energy(velocities, masses) + potential_energy(positions, masses)
+        momentum = angular_momentum(positions, velocities, masses)
+        if self._energy is None:
+            self._energy = energy
+            self._momentum = momentum
+            return
+
+        self.max_energy_drift = max(self.max_energy_drift, abs((energy - self._energy) / self._energy))
+        momentum_scale = np.linalg.norm(self._momentum)
+        if momentum_scale > 0:
+            drift = float(np.linalg.norm(momentum - self._momentum) / momentum_scale)
+            self.max_momentum_drift = max(self.max_momentum_drift, drift)
+
+    def __str__(self):
+        return f'max relative energy drift: {self.max_energy_drift:.3e}, ' \
+               f'max relative angular momentum drift: {self.max_momentum_drift:.3e}'
@@ -0,0 +1,15 @@
+import numpy as np
+
+from v1.engine.integrator.integrator import GravityFunction, Integrator
+
+
+class SemiImplicitEuler(Integrator):
+    """ First order, velocity first and then position with the new velocity. One force evaluation per step """
+
+    def step(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray, external: np.ndarray, dt: float,
+             gravity: GravityFunction):
+        # Translate force to acceleration, calculate velocity and add it to velocity
+        velocities += self._acceleration(positions, masses, external, gravity) * dt
+
+        # Translate velocity to position
+        positions += velocities * dt
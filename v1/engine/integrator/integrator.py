@@ -0,0 +1,34 @@
+from abc import abstractmethod
+from typing import Callable
+
+import numpy as np
+
+""" Adds gravitational forces for the given positions to forces: gravity(positions, forces, targets=None), targets
+optionally limits the bodies receiving force, @see GravitySolver.apply
+"""
+GravityFunction = Callable[..., None]
+
+
+class Integrator:
+    """ Advances positions and velocities of all bodies by one step """
+
+    @abstractmethod
+    def step(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray, external: np.ndarray, dt: float,
+             gravity: GravityFunction):
+        """ Advance one step, positions and velocities are updated in place
+
+        :param positions: (N, 3) positions in meters
+        :param velocities: (N, 3) velocities in m/s
+        :param masses: (N,) masses in kg
+        :param external: (N, 3) forces applied by listeners, constant during the step
+        :param dt: step in seconds
+        :param gravity: adds gravitational forces for positions, may be called multiple times per step
+        """
+        pass
+
+    @staticmethod
+    def _acceleration(positions: np.ndarray, masses: np.ndarray, external: np.ndarray,
+                      gravity: GravityFunction) -> np.ndarray:
+        forces = external.copy()
+        gravity(positions, forces)
+        return forces / masses[:, None]
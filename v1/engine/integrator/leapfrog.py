@@ -0,0 +1,13 @@
+import numpy as np
+
+from v1.engine.integrator.integrator import GravityFunction, Integrator
+
+
+class Leapfrog(Integrator):
+    """ Second order symplectic, drift-kick-drift. One force evaluation per step """
+
+    def step(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray, external: np.ndarray, dt: float,
+             gravity: GravityFunction):
+        positions += velocities * (dt / 2)
+        velocities += self._acceleration(positions, masses, external, gravity) * dt
+        positions += velocities * (dt / 2)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from v1.engine.integrator.integrator import GravityFunction, Integrator
+
+
+class VelocityVerlet(Integrator):
+    """ Second order symplectic, kick-drift-kick
+
+    The gravity at the end of a step is reused at the start of the next one, so it costs one gravity evaluation per
+    step as long as nothing else moves the bodies in between.
+    """
+
+    def __init__(self):
+        self._positions = None
+        self._gravity = None
+
+    def step(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray, external: np.ndarray, dt: float,
+             gravity: GravityFunction):
+        if self._positions is None or not np.array_equal(self._positions, positions):
+            self._gravity = np.zeros_like(positions)
+            gravity(positions, self._gravity)
+
+        velocities += (external + self._gravity) / masses[:, None] * (dt / 2)
+        positions += velocities * dt
+
+        self._gravity = np.zeros_like(positions)
+        gravity(positions, self._gravity)
+        velocities += (external + self._gravity) / masses[:, None] * (dt / 2)
+
+        self._positions = positions.copy()
@@ -0,0 +1,23 @@
+import numpy as np
+
+from v1.engine.integrator.integrator import GravityFunction, Integrator
+
+
+class Yoshida4(Integrator):
+    """ Fourth order symplectic (Yoshida / Forest-Ruth), three leapfrog steps with tuned weights. Three force
+    evaluations per step
+    """
+
+    _W1 = 1 / (2 - 2 ** (1 / 3))
+    _W0 = -2 ** (1 / 3) * _W1
+
+    """ Drift and kick weights """
+    DRIFTS = (_W1 / 2, (_W0 + _W1) / 2, (_W0 + _W1) / 2, _W1 / 2)
+    KICKS = (_W1, _W0, _W1)
+
+    def step(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray, external: np.ndarray, dt: float,
+             gravity: GravityFunction):
+        for drift, kick in zip(self.DRIFTS, self.KICKS):
+            positions += velocities * (drift * dt)
+            velocities += self._acceleration(positions, masses, external, gravity) * (kick * dt)
+        positions += velocities * (self.DRIFTS[-1] * dt)
@@ -26,6 +26,13 @@ class Listener:
         """ Executed once per component per frame """
         pass
 
+    def loop_many(self, cs: list[Component]):
+        """ Executed once per frame with all components of this listener, calls loop per component by default.
+        Override to handle all components at once, e.g. with the arrays of SimulationContext.get_bodies()
+        """
+        for c in cs:
+            self.loop(c)
+
     @staticmethod
     @abstractmethod
     def should_listen(c: Component) -> bool:
@@ -1,166 +1,91 @@
-import math
+import time
 
+import numpy as np
+
+from v1.engine.collision.broadphase import unpack_keys
+from v1.engine.collision.ccd import bounding_radius, swept_bounds, time_of_impact
+from v1.engine.component.body_store import BodyStore
 from v1.engine.component.component import Component
 from v1.engine.component.physical_component import PhysicalComponent
+from v1.engine.context.physics_context import PhysicsContext
 from v1.engine.context.simulation_context import SimulationContext
 from v1.engine.listener.listener import Listener
 from v1.engine.settings import Settings
-from v1.engine.util.vector3d import Vector3D
 
 
 class PhysicsListener(Listener):
-    G: float = 6.67430e-11
-    gravity_history: dict[int, None] = {}  # Dict for better performance
-
-    collision_pos_events = {'x': {}, 'y': {}, 'z': {}}
-
     def start(self, c: PhysicalComponent):
         pass
 
-    def loop_single_before(self):
-        # Reset history
-        self.gravity_history = {}
-
-    def loop_single_after(self):
-        self._collision_single()
-        self.collision_pos_events = {'x': {}, 'y': {}, 'z': {}}
-
-    # Can safely assume PhysicalComponent because of should_listen()
-    def loop(self, c: PhysicalComponent):
+    def loop_many(self, cs: list[PhysicalComponent]):
+        """ Steps all physical components at once with the arrays of the BodyStore, which holds exactly cs """
         time_s = Settings.delta / 1000  # Time in seconds
+        bodies = self.context.get(SimulationContext).get_bodies()
+        physics = self.context.get(PhysicsContext)
+        profiler = self.context.get(SimulationContext).get_profiler()
 
-        self._collision_loop(c)
-
-        # Time complexity: O(n**2 / 2)
-        sim_context = self.context.get(SimulationContext)
-        for other_cid in sim_context.get_components():
-            if other_cid in self.gravity_history or other_cid == c.id:
-                continue  # Already calculated or itself
+        # Collisions are checked over the whole step, from the positions at the start of the frame
+        start_positions = bodies.positions.copy()
 
-            other = sim_context.get_component(other_cid)
-            if not isinstance(other, PhysicalComponent):
-                continue  # No gravity for non-physical components
-
-            self._compute_gravity(c, other)
-
-        # Translate force to acceleration, calculate velocity and add it to velocity
-        a = c.net_force / c.mass
-        c.velocity += a * time_s
+        # Forces applied by listeners are kept constant during the step, gravity is evaluated by the integrator
+        forces = bodies.forces
+        masses = bodies.masses
+        gravity = lambda positions, out, targets=None: physics.gravity.apply(positions, masses, out, targets)
+        if profiler is not None:
+            gravity = profiler.timed('gravity', gravity)
+        physics.integrator.step(bodies.positions, bodies.velocities, masses, forces, time_s, gravity)
 
         # Reset force
-        c.net_force = 0
-
-        # Translate velocity to position
-        c.position = c.position + (c.velocity * time_s)
+        forces[:] = 0
 
-        # Add component to history
-        self.gravity_history[c.id] = None
+        self._collision_single(bodies, physics, start_positions, time_s)
 
     @staticmethod
     def should_listen(c: Component) -> bool:
         return isinstance(c, PhysicalComponent)
 
-    def _compute_gravity(self, c: PhysicalComponent, other: PhysicalComponent):
-        # Calculate gravity, very accurate but very inefficient
-        #   TODO: better use The Barnes-Hut Algorithm, but tiny loss in accuracy
-        # Right now O(n**2), but we continue if checked, so heavy computation is O(n**2 / 2)
-        # n = number of PhysicalComponents
-
-        # Calculate translation and distance with a minimum of 1 to avoid division errors
-        #   and should be physically impossible, because it would attract more than it's mass allows
-        pos_diff = other.position - c.position
-        distance = math.sqrt(pos_diff.x ** 2 + pos_diff.y ** 2 + pos_diff.z ** 2)
-        limited_distance = max(1.0, distance)
-
-        # Calculate gravitational force
-        gravity_force = self.G * c.mass * other.mass / limited_distance ** 2
-
-        # Add force to component. If distance is 0, we have a force that's equal in every axes
-        if distance != 0:
-            force: Vector3D = gravity_force / distance * pos_diff
-            c.net_force += force
-            other.net_force += -force
-            return
-
-        # TODO: Rework: @see PhysicalComponent.net_force comment
-        # Distance == 0, so we calculate net force by checking if gravity force is stronger than current net force
-        # If so, we can simply put 0 as the object does not have enough to overcome gravity force
-        # If not, we subtract the gravity_force and the leftover force will be the force applied
-        def _calculate_force(net_force: float):
-            if gravity_force > abs(net_force):
-                return 0
-
-            # Leftover force between net_force and gravity_force in direction of net_force, therefore gravity_force is
-            # converted to - or + to align with net_force (with copysign)
-            return net_force - gravity_force * math.copysign(1, net_force)
-
-        # Apply forces
-        c.net_force = Vector3D(
-            _calculate_force(c.net_force.x),
-            _calculate_force(c.net_force.y),
-            _calculate_force(c.net_force.z)
-        )
-        other.net_force = Vector3D(
-            _calculate_force(other.net_force.x),
-            _calculate_force(other.net_force.y),
-            _calculate_force(other.net_force.z)
-        )
-
-    def _collision_loop(self, c: PhysicalComponent):
-        # Largest possible radius for colliding
-        radius = math.sqrt(c.size.x ** 2 + c.size.y ** 2 + c.size.z) / 2
-
-        # define start and end position of component for each axes
-        self.collision_pos_events['x'].setdefault(c.position.x - radius, []).append((1, c.id))
-        self.collision_pos_events['x'].setdefault(c.position.x + radius, []).append((-1, c.id))
-
-        self.collision_pos_events['y'].setdefault(c.position.y - radius, []).append((1, c.id))
-        self.collision_pos_events['y'].setdefault(c.position.y + radius, []).append((-1, c.id))
-
-        self.collision_pos_events['z'].setdefault(c.position.z - radius, []).append((1, c.id))
-        self.collision_pos_events['z'].setdefault(c.position.z + radius, []).append((-1, c.id))
-
-    def _collision_single(self):
-        """ Checking for possible collisions and sends them to _collision_detect """
-        # TODO: No continuous collision detection yet, maybe implement later?
+    def _collision_single(self, bodies: BodyStore, physics: PhysicsContext, start_positions: np.ndarray,
+                          time_s: float):
+        """ Continuous collision detection, sends every pair of bounding spheres touching during the step to
+        _collision_detect, in order of time of impact
+        """
         context = self.context.get(SimulationContext)
+        profiler = context.get_profiler()
+        end_positions = bodies.positions
+        radius = bounding_radius(bodies.sizes)
+
+        # Boxes around the path of every sphere, only those overlapping can touch during the step
+        start = time.perf_counter()
+        candidates = physics.broadphase.update(bodies.ids, *swept_bounds(start_positions, end_positions, radius))
+        if profiler is not None:
+            profiler.add('broadphase', time.perf_counter() - start)
+        if not candidates:
+            return
 
-        # Possible collisions per axes
-        poss_coll_axial = {'x': {}, 'y': {}, 'z': {}}
-
-        # Loop through events and check for possible collisions per axes
-        for axial in self.collision_pos_events:
-            active_components = set()
-            for pos in sorted(self.collision_pos_events[axial].keys()):
-                for c_meta in self.collision_pos_events[axial][pos]:
-                    event_type = c_meta[0]
-                    cid = c_meta[1]
-
-                    # If -1, end of component
-                    if event_type == -1:
-                        active_components.remove(cid)
-                        continue
-
-                    # Start of component
-                    for active_id in active_components:
-                        poss_coll_axial[axial][f'{active_id}+{cid}'] = True  # Possible collision detected
-                    active_components.add(cid)
-
-        # poss_coll_axial only checks per axes, so check if possible collision is present for all 3 axes,
-        # if so: inpect actual mesh to see if collision is occuring, or will occur.
-        for k in poss_coll_axial['x']:
-            if k not in poss_coll_axial['y'] or k not in poss_coll_axial['z']:
-                continue
-
-            cids = k.split('+')
+        keys = np.array(sorted(candidates), dtype=np.int64)
+        ids = bodies.ids.astype(np.int64)
+        rows = np.zeros(ids.max() + 1, dtype=np.int64)
+        rows[ids] = np.arange(len(ids))
+        first, second = unpack_keys(keys)
+        a, b = rows[first], rows[second]
+
+        # Bodies are assumed to move in a straight line during the step
+        toi = time_of_impact(start_positions[a], end_positions[a], start_positions[b], end_positions[b],
+                             radius[a] + radius[b])
+        hits = np.flatnonzero(~np.isnan(toi))
+        for i in hits[np.argsort(toi[hits], kind='stable')].tolist():
             # should be a physical component
             # noinspection PyTypeChecker
-            self._collision_detect(context.get_component(int(cids[0])), context.get_component(int(cids[1])))
+            self._collision_detect(
+                context.get_component(int(ids[a[i]])), context.get_component(int(ids[b[i]])), float(toi[i]) * time_s
+            )
 
-    def _collision_detect(self, c1: PhysicalComponent, c2: PhysicalComponent):
+    def _collision_detect(self, c1: PhysicalComponent, c2: PhysicalComponent, toi: float):
+        """ Bounding spheres of c1 and c2 touch toi seconds after the start of the step """
         # TODO: When mesh implemented detect accurately
-        print(f'{c1.name} & {c2.name} possible collision')
+        print(f'{c1.name} & {c2.name} possible collision after {toi:.1f}s')
+        self._collision_handle(c1, c2, toi)
 
-    def _collision_handle(self, c1: PhysicalComponent, c2: PhysicalComponent):
+    def _collision_handle(self, c1: PhysicalComponent, c2: PhysicalComponent, toi: float):
         # TODO: Maybe merge with collision detect, as it probs contains information this function needs to act on
         pass
@@ -0,0 +1,63 @@
+import math
+
+from v1.engine.settings import Settings
+
+
+class OutputClock:
+    """ Decides which loops of a simulation reach the storage and renderer, so a small Settings.delta for accurate
+    integration doesn't multiply stored frames and keyframes
+
+    Either every stride-th loop is output as is, or outputs happen every interval ms of simulated time. Output times
+    rarely fall on a loop then, the state at such a time is interpolated between the loops around it.
+    """
+
+    """ Loops per output """
+    stride: int
+
+    """ Simulated ms per output, None to output by stride """
+    interval: float | None
+
+    def __init__(self, stride: int = 1, interval: float | None = None):
+        if stride < 1:
+            raise ValueError(f'Stride must be at least 1, not {stride}')
+        if interval is not None and interval <= 0:
+            raise ValueError(f'Interval must be positive, not {interval}')
+
+        self.stride = stride
+        self.interval = interval
+
+    @classmethod
+    def video(cls, speed: float, fps: int = None) -> 'OutputClock':
+        """ Outputs fps frames per second of video showing speed simulated seconds per second
+
+        :param fps: Settings.fps by default
+        """
+        fps = fps if fps is not None else Settings.fps
+        return cls(interval=speed * 1000 / fps)
+
+    @property
+    def interpolates(self) -> bool:
+        return self.interval is not None
+
+    def outputs(self, loop: int) -> list[tuple[int, float]]:
+        """ Outputs of the step from loop - 1 to loop, as iteration and how far into the step they are
+
+        A fraction of 1 is the state at loop itself. Iterations are the loop by stride, and the number of the output by
+        interval, its simulated time being iteration * interval.
+        """
+        if self.interval is None:
+            return [(loop, 1.0)] if loop % self.stride == 0 else []
+
+        # Output times in (previous, now], a small tolerance keeps times on a loop from slipping to the next one
+        previous, now = (loop - 1) * Settings.delta, loop * Settings.delta
+        first = math.floor(previous / self.interval + 1e-9) + 1
+        last = math.floor(now / self.interval + 1e-9)
+        return [
+            (k, min(max((k * self.interval - previous) / Settings.delta, 0.0), 1.0)) for k in range(first, last + 1)
+        ]
+
+    def last(self, loop: int) -> int:
+        """ Iteration of the last output up to and including loop, @see outputs """
+        if self.interval is None:
+            return loop // self.stride * self.stride
+        return math.floor(loop * Settings.delta / self.interval + 1e-9)
@@ -0,0 +1,198 @@
+import csv
+import json
+import os
+import time
+from typing import Callable
+
+import numpy as np
+
+from root import base_dir
+from v1.engine.settings import Settings
+
+
+class Profiler:
+    """ Time spent per phase of every loop of a simulation, cheap enough to keep on for long runs
+
+    A loop is timed in laps: every lap adds the time since the previous one to a phase. Simulation.loop laps
+    loop_single_before, loop_many per listener, loop_single_after, storage, events, checkpoint and render, and
+    frame holds the whole loop. Phases timed within a lap, like gravity and broadphase within loop_many PhysicsListener,
+    are part of that lap as well.
+
+    Every loop becomes a row of the timeline, statistics are taken over the last window rows of it.
+    """
+
+    """ Phases in order of first use, the columns of the timeline """
+    phases: list[str]
+
+    """ Loops the rolling statistics are taken over """
+    window: int
+
+    """ Loops kept in the timeline, None for all """
+    history: int | None
+
+    def __init__(self, name: str = 'profile', window: int = 1000, history: int | None = None):
+        self.path = os.path.join(base_dir(), 'data', name)
+        self.phases = ['frame']
+        self.window = window
+        self.history = history
+
+        self._index = {'frame': 0}
+        self._current = [0.0]
+        self._begin = 0.0
+        self._lap = 0.0
+        self._loop = 0
+
+        # loop | seconds per phase
+        self._timeline = np.zeros((history or 1024, 2), dtype=np.float64)
+        self._rows = 0
+
+    def begin(self, loop: int):
+        """ Starts timing a loop """
+        self._loop = loop
+        self._begin = self._lap = time.perf_counter()
+
+    def lap(self, phase: str):
+        """ Adds the time since the previous lap, or begin, to phase """
+        now = time.perf_counter()
+        self.add(phase, now - self._lap)
+        self._lap = now
+
+    def add(self, phase: str, seconds: float):
+        index = self._index.get(phase)
+        if index is None:
+            index = self._index[phase] = len(self.phases)
+            self.phases.append(phase)
+            self._current.append(0.0)
+        self._current[index] += seconds
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        """ Function adding the time of every call to phase """
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - start)
+        return wrapper
+
+    def end(self):
+        """ Ends timing a loop and adds it to the timeline """
+        self._current[0] = time.perf_counter() - self._begin
+
+        timeline = self._timeline
+        if len(self.phases) + 1 > timeline.shape[1] or (self.history is None and self._rows == len(timeline)):
+            timeline = self._grow()
+        row = timeline[self._rows % len(timeline)]
+        row[0] = self._loop
+        row[1:len(self._current) + 1] = self._current
+
+        self._rows += 1
+        self._current = [0.0] * len(self._current)
+
+    def timeline(self, last: int | None = None) -> np.ndarray:
+        """ (loops, 1 + phases) kept loops in order, as loop number and ms per phase
+
+        :param last: Only the last loops, all kept by default
+        """
+        kept = min(self._rows, len(self._timeline))
+        last = kept if last is None else min(last, kept)
+
+        return self._timeline[self._order(last), :len(self.phases) + 1] * np.r_[1, np.full(len(self.phases), 1000)]
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """ Per phase the mean, p95 and max ms, and its share of the frame, over the last window loops
+        { phase: { 'mean': ms, 'p95': ms, 'max': ms, 'share': 0 - 1 } }
+        """
+        rows = self.timeline(self.window)[:, 1:]
+        if len(rows) == 0:
+            return {}
+
+        mean, p95, peak = rows.mean(axis=0), np.percentile(rows, 95, axis=0), rows.max(axis=0)
+        frame = mean[0] if mean[0] > 0 else 1
+        return {
+            phase: {
+                'mean': float(mean[i]), 'p95': float(p95[i]), 'max': float(peak[i]), 'share': float(mean[i] / frame),
+            }
+            for i, phase in enumerate(self.phases)
+        }
+
+    def report(self) -> str:
+        """ stats as a table, phases taking the most time first """
+        stats = self.stats()
+        lines = [f'{"phase":<32} {"mean ms":>10} {"p95 ms":>10} {"max ms":>10} {"share":>7}']
+        for phase, s in sorted(stats.items(), key=lambda item: -item[1]['mean']):
+            lines.append(f'{phase:<32} {s["mean"]:>10.3f} {s["p95"]:>10.3f} {s["max"]:>10.3f} {s["share"]:>7.1%}')
+        return '\n'.join(lines)
+
+    def to_csv(self, path: str | None = None) -> str:
+        """ Writes the timeline as CSV with a row per loop, to data/<name>.csv by default. Returns the path. """
+        path = path or self.path + '.csv'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['loop'] + [f'{phase} ms' for phase in self.phases])
+            for row in self.timeline().tolist():
+                writer.writerow([int(row[0])] + row[1:])
+        return path
+
+    def to_json(self, path: str | None = None) -> str:
+        """ Writes the timeline as JSON with a list per column and the stats, to data/<name>.json by default. Returns
+        the path.
+        """
+        path = path or self.path + '.json'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        timeline = self.timeline()
+        with open(path, 'w') as f:
+            json.dump({
+                'loop': timeline[:, 0].astype(np.int64).tolist(),
+                'ms': {phase: timeline[:, i + 1].tolist() for i, phase in enumerate(self.phases)},
+                'stats': self.stats(),
+            }, f)
+        return path
+
+    def _order(self, last: int) -> np.ndarray:
+        """ Indices of the last rows of the timeline in order, rows wrap around once history is full """
+        return np.arange(self._rows - last, self._rows) % len(self._timeline)
+
+    def _grow(self) -> np.ndarray:
+        rows = self._timeline[self._order(min(self._rows, len(self._timeline)))]
+
+        capacity = self.history or max(2 * len(self._timeline), 1024)
+        self._timeline = np.zeros((capacity, max(2 * (len(self.phases) + 1), self._timeline.shape[1])))
+        self._timeline[:len(rows), :rows.shape[1]] = rows
+        self._rows = len(rows)
+        return self._timeline
+
+
+class Progress:
+    """ Prints the loop count at most every interval seconds, printing every loop costs more than a small loop """
+
+    """ Seconds between prints """
+    interval: float
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._time: float | None = None
+        self._loop = 0
+
+    def update(self, loop: int, profiler: Profiler | None = None):
+        now = time.perf_counter()
+        if self._time is not None and now - self._time < self.interval:
+            return
+
+        message = f'loop count: {loop}/{Settings.frame_limit}'
+        if self._time is not None:
+            message += f', {(loop - self._loop) / (now - self._time):.1f} loops/s'
+        if profiler is not None and 'frame' in (stats := profiler.stats()):
+            message += f', frame {stats["frame"]["mean"]:.3f} ms'
+        print(message)
+
+        self._time = now
+        self._loop = loop
+
+    def __getstate__(self) -> dict:
+        # The clock of another process means nothing
+        return {'interval': self.interval}
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
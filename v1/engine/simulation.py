@@ -1,13 +1,18 @@
 from typing import TypedDict, Type
 
+from v1.engine.component.body_store import BodySnapshot, BodyStore
 from v1.engine.component.component import Component
 from v1.engine.component.physical_component import PhysicalComponent
 from v1.engine.context.context import Context
 from v1.engine.context.context_container import ContextContainer
+from v1.engine.context.physics_context import PhysicsContext
 from v1.engine.context.simulation_context import SimulationContext
 from v1.engine.listener.listener import Listener
 from v1.engine.listener.physics_listener import PhysicsListener
+from v1.engine.output_clock import OutputClock
+from v1.engine.profiler import Profiler, Progress
 from v1.engine.settings import Settings
+from v1.engine.storage.checkpoint import Checkpoint
 from v1.engine.storage.csv_storage import CSVStorage
 from v1.engine.storage.storage import Storage
 from v1.rendering.renderer import Renderer
@@ -23,35 +28,56 @@ class Simulation:
     renderer: Renderer | None
     storage: Storage | None
     event_storage: Storage | None
+    checkpoint: Checkpoint | None
+
+    """ Loops reaching storage and renderer, every loop by default """
+    output: OutputClock
+
+    """ Times phases of every loop, off by default """
+    profiler: Profiler | None
+
+    """ Prints the loop count now and then, None to stay silent """
+    progress: Progress | None
     run: bool = False
 
     """ Environment containing all items
     { component_id: Component }
     """
-    env: dict[int, Component] = {}
+    env: dict[int, Component]
 
     """ { component_id: ComponentMeta } """
-    components_meta: dict[int, ComponentMeta] = {}
+    components_meta: dict[int, ComponentMeta]
 
     """ Listeners
     { id: Listener }
     """
-    listeners: dict[int, Listener] = {}
+    listeners: dict[int, Listener]
 
     # Mappers / categorizes
     """ Component ids mapped by name
         { name: component_id }
     """
-    components_by_name: dict[str, int] = {}
+    components_by_name: dict[str, int]
 
     """ list[component_id] """
-    physical_components: list[int] = []
+    physical_components: list[int]
+
+    """ list[component_id] of the components outside of the BodyStore """
+    non_physical_components: list[int]
+
+    """ Components per listener, in order of adding
+    { listener_id: list[Component] }
+    """
+    subscriptions: dict[int, list[Component]]
 
-    events: dict | None = None  # EventContainer
+    """ State of all physical components as contiguous arrays """
+    bodies: BodyStore
+
+    events: dict | None  # EventContainer
 
     # Other
     context_container: ContextContainer
-    loop_counter = 0
+    loop_counter: int
 
     def __init__(
             self,
@@ -59,16 +85,38 @@ class Simulation:
             contexts: list[Context],
             renderer: Renderer = None,
             storage: Storage = None,
+            checkpoint: Checkpoint = None,
+            output: OutputClock = None,
+            profiler: Profiler = None,
+            progress: Progress | bool = True,
     ):
         self.renderer = renderer
         self.storage = storage
         self.event_storage = CSVStorage(storage.name + '_events', 1) if storage else None
+        self.checkpoint = checkpoint
+        self.output = output if output is not None else OutputClock()
+        self.profiler = profiler
+        self.progress = Progress() if progress is True else progress or None
+        self.env = {}
+        self.components_meta = {}
+        self.listeners = {}
+        self.components_by_name = {}
+        self.physical_components = []
+        self.non_physical_components = []
+        self.bodies = BodyStore()
+        self.events = None
+        self.loop_counter = 0
+
+        # State of the previous loop, to interpolate outputs in between
+        self._previous: BodySnapshot | None = None
 
         # Setup context container
         self.context_container = ContextContainer()
         self.context_container.add(SimulationContext(self))
         for c in contexts:
             self.context_container.add(c)
+        if not any(isinstance(c, PhysicsContext) for c in contexts):
+            self.context_container.add(PhysicsContext())
 
         # Setup listeners
         for i in range(len(listeners)):
@@ -76,6 +124,46 @@ class Simulation:
 
         # Append PhysicsListener last, to ensure all listener actions are translated into physics
         self.listeners[len(self.listeners)] = PhysicsListener(self.context_container)
+        self.subscriptions = {lid: [] for lid in self.listeners}
+
+    @classmethod
+    def resume(
+            cls,
+            path: str,
+            renderer: Renderer = None,
+            storage: Storage = None,
+            checkpoint: Checkpoint = None,
+    ) -> 'Simulation':
+        """ Simulation as it was when the checkpoint at path was written, start continues with the next loop.
+        Settings are restored as well. Renderer, storage and checkpoint are not part of a checkpoint.
+
+        To continue the stored trajectory of the run, pass its storage opened with clear=False, e.g.
+        BinaryStorage(name, store_interval, clear=False). Frames it stored after the checkpoint are removed, they're
+        stored again as the simulation continues. A storage constructed as usual removes what's stored under its name,
+        use a new name to keep the trajectory before the checkpoint. Events always continue those of the run.
+        """
+        sim: Simulation = Checkpoint.load(path)
+        sim.renderer = renderer
+        sim.storage = storage
+        sim.event_storage = CSVStorage(storage.name + '_events', 1, clear=False) if storage else None
+        sim.checkpoint = checkpoint
+
+        if storage is not None:
+            storage.truncate(sim.output.last(sim.loop_counter))
+            sim.event_storage.truncate(sim.loop_counter)
+        return sim
+
+    def __getstate__(self) -> dict:
+        # Renderer, storage and checkpoint hold files and threads
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in ['renderer', 'storage', 'event_storage', 'checkpoint']}
+        state['settings'] = {k: v for k, v in vars(Settings).items() if not k.startswith('_')}
+        return state
+
+    def __setstate__(self, state: dict):
+        for k, v in state.pop('settings').items():
+            setattr(Settings, k, v)
+        self.__dict__.update(state)
 
     def setup(self):
         # Most is moved to add_component
@@ -84,9 +172,14 @@ class Simulation:
 
     def start(self):
         self.run = True
-        for cid in self.env:
-            for lid in self.components_meta[cid]['listeners']:
-                self.listeners[lid].start(self.env[cid])
+
+        # A resumed simulation has started before
+        if self.loop_counter == 0:
+            for cid in self.env:
+                for lid in self.components_meta[cid]['listeners']:
+                    self.listeners[lid].start(self.env[cid])
+        if self.output.interpolates and self._previous is None:
+            self._previous = self.bodies.snapshot()
 
         if self.renderer is not None:
             self.renderer.render_frame(self.env)
@@ -99,43 +192,95 @@ class Simulation:
 
     def loop(self):
         self.loop_counter += 1
-        print(f'loop count: {self.loop_counter}')
+        profiler = self.profiler
+        if self.progress is not None:
+            self.progress.update(self.loop_counter, profiler)
+        if profiler is not None:
+            profiler.begin(self.loop_counter)
 
         # Execute single loop before normal loop per listener
         for lid in self.listeners:
             self.listeners[lid].loop_single_before()
+        if profiler is not None:
+            profiler.lap('loop_single_before')
 
-        # For each component, execute the loop of its listeners
-        for cid in self.env:
-            for lid in self.components_meta[cid]['listeners']:
-                self.listeners[lid].loop(self.env[cid])
+        # Execute loop of each listener with all of its components at once
+        for lid in self.listeners:
+            self.listeners[lid].loop_many(self.subscriptions[lid])
+            if profiler is not None:
+                profiler.lap(f'loop_many {type(self.listeners[lid]).__name__}')
 
         # Execute single loop after normal loop per listener
         for lid in self.listeners:
             self.listeners[lid].loop_single_after()
+        if profiler is not None:
+            profiler.lap('loop_single_after')
 
-        # Append to storage
-        if self.storage is not None:
-            self.storage.append(self.env, self.loop_counter)
+        self._output()
 
         if self.events is not None and self.event_storage is not None:
             self.event_storage.append(self.events, self.loop_counter)
             self.events = None
-
-        # Render/visualize next frame
-        if self.renderer is not None:
-            self.renderer.render_frame(self.env)
-            self.renderer.next_frame()
+            if profiler is not None:
+                profiler.lap('events')
+
+        if self.checkpoint is not None and self.loop_counter % self.checkpoint.interval == 0:
+            # Frames up to the checkpoint are saved first, so a resumed simulation continues a complete trajectory
+            if self.storage is not None:
+                self.storage.save()
+            self.checkpoint.write(self)
+            if profiler is not None:
+                profiler.lap('checkpoint')
+
+        # Saving and closing storage and renderer is part of the last loop
         if Settings.frame_limit <= self.loop_counter:
             self.stop()
+            if profiler is not None:
+                profiler.lap('stop')
+        if profiler is not None:
+            profiler.end()
+
+    def _output(self):
+        """ Appends to storage and renders the next frame for every output of this loop @see OutputClock """
+        if self.storage is None and self.renderer is None:
+            return
+
+        outputs = self.output.outputs(self.loop_counter)
+        current = None
+        if self.storage is not None or self.output.interpolates:
+            current = self.bodies.snapshot([self.env[cid] for cid in self.non_physical_components])
+        for iteration, fraction in outputs:
+            # Renderers read the components, interpolated state is rendered from detached copies
+            state, frame = current, self.env
+            if fraction < 1 and self._previous is not None:
+                state = self._previous.interpolate(current, fraction)
+                if state is not current:
+                    frame = {**self.env, **state.to_frame()}
+
+            if self.storage is not None:
+                self.storage.append(state, iteration)
+                if self.profiler is not None:
+                    self.profiler.lap('storage')
+            if self.renderer is not None:
+                self.renderer.render_frame(frame)
+                self.renderer.next_frame()
+                if self.profiler is not None:
+                    self.profiler.lap('render')
+
+        if self.output.interpolates:
+            self._previous = current
 
     def stop(self):
         self.run = False
 
         if self.storage is not None:
             self.storage.save()
+            self.storage.close()
         if self.renderer is not None:
             self.renderer.save()
+        if self.checkpoint is not None:
+            self.checkpoint.wait()
+        self.context_container.get(PhysicsContext).gravity.close()
 
     def add_component(self, c: Component):
         c.id = list(self.env)[-1] + 1 if len(self.env) > 0 else 0
@@ -145,6 +290,9 @@ class Simulation:
 
         if isinstance(c, PhysicalComponent):
             self.physical_components.append(c.id)
+            self.bodies.attach(c)
+        else:
+            self.non_physical_components.append(c.id)
 
         listener_ids = []
         for lid in self.listeners:
@@ -153,6 +301,9 @@ class Simulation:
 
         self.env[c.id] = c
         self.components_meta[c.id] = {'listeners': listener_ids}
+        for lid in listener_ids:
+            self.subscriptions[lid].append(c)
+        self.components_by_name[c.name] = c.id
 
         if self.renderer is not None:
             self.renderer.add_component(c)
@@ -179,6 +330,15 @@ class Simulation:
                 self.events = {'add': [], 'remove': []}
             self.events['remove'].append(self.env[cid])
 
+        if isinstance(self.env[cid], PhysicalComponent):
+            self.physical_components.remove(cid)
+            self.bodies.detach(self.env[cid])
+        else:
+            self.non_physical_components.remove(cid)
+
+        for lid in self.components_meta[cid]['listeners']:
+            self.subscriptions[lid].remove(self.env[cid])
+
         del self.env[cid]
         del self.components_meta[cid]
         del self.components_by_name[cname]
@@ -0,0 +1,205 @@
+import os
+from typing import Generator
+
+import numpy as np
+import zstandard
+
+from v1.engine.storage.binary_storage import BinaryStorage
+
+
+class ArchiveStorage(BinaryStorage):
+    """ Compressed trajectory, same rows as BinaryStorage but grouped in blocks of frames compressed with zstd
+
+    A block holds consecutive frames with the same components. Every value is stored as the difference of its float64
+    bits with the same value in the frame before, and the block is laid out per column and per component over time, so
+    everything that barely changes (ids, rotations, leading bytes of positions) becomes runs of zeros. The block is
+    byte-shuffled afterward, the n-th byte of every value next to each other, which zstd compresses a lot better.
+
+    Files, next to each other and named after the blocks, e.g. x.zarc.idx:
+        .zarc: header followed by the compressed blocks
+        .zarc.blocks: int64 per block: offset in .zarc | compressed size | amount of frames | rows per frame
+        .zarc.idx: int64 per frame: iteration | block | frame in the block | amount of rows
+        .zarc.meta: @see BinaryStorage
+
+    A single frame only decodes its own block, the last decoded block is kept for reading frames in order. Construct
+    with clear=False to open a stored trajectory, @see BinaryStorage.
+    """
+
+    MAGIC = b'PSIZ'
+    EXTENSION = '.zarc'
+
+    """ Max frames per block, larger compresses better but decoding a single frame costs more """
+    block_frames: int
+
+    """ zstd compression level, 1 (fast) to 22 (small) """
+    level: int
+
+    def __init__(self, name: str, store_interval: int, block_frames: int = 64, level: int = 3, clear: bool = True):
+        super().__init__(name, store_interval, clear)
+        self.block_frames = block_frames
+        self.level = level
+        self.blocks_path = self.path + '.blocks'
+        if clear and os.path.isfile(self.blocks_path):
+            os.remove(self.blocks_path)
+
+        self._cache = (-1, None)  # Last decoded block: (block, (frames, rows, WIDTH))
+
+    def save(self):
+        print(f'Saving {len(self.temp_data)} frame(s) to "{self.path}"..')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        file_exists = os.path.isfile(self.path)
+        offset = os.path.getsize(self.path) if file_exists else self.HEADER.size
+        blocks_written = len(self.blocks()) if os.path.isfile(self.blocks_path) else 0
+        frames = []
+        blocks = []
+        with open(self.path, 'ab') as f:
+            if not file_exists:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.WIDTH))
+
+            for start, stop in self._runs():
+                block = blocks_written + len(blocks)
+                bits = np.stack(self.temp_data[start:stop]).view(np.int64)
+
+                # Difference with the frame before wraps around, so the cumulative sum restores it exactly
+                delta = np.diff(bits, axis=0, prepend=np.zeros_like(bits[:1]))
+                compressed = compressor.compress(_shuffle(delta.transpose((2, 1, 0)).tobytes()))
+                f.write(compressed)
+
+                blocks.append([offset, len(compressed), stop - start, bits.shape[1]])
+                frames += [[self.temp_iterations[i], block, i - start, bits.shape[1]] for i in range(start, stop)]
+                offset += len(compressed)
+
+        with open(self.blocks_path, 'ab') as f:
+            f.write(np.array(blocks, dtype=np.int64).reshape((-1, 4)).tobytes())
+        with open(self.index_path, 'ab') as f:
+            f.write(np.array(frames, dtype=np.int64).reshape((-1, 4)).tobytes())
+        self._save_meta()
+
+        self.temp_data = []
+        self.temp_iterations = []
+        print(f'Saved! Compression ratio {self.compression_ratio():.2f}')
+
+    def _runs(self) -> Generator[tuple[int, int], None, None]:
+        """ Ranges of temp frames forming a block: same components and at most block_frames """
+        start = 0
+        for i in range(1, len(self.temp_data) + 1):
+            if i == len(self.temp_data) or i - start == self.block_frames or \
+                    not _same_components(self.temp_data[i - 1], self.temp_data[i]):
+                yield start, i
+                start = i
+
+    def compression_ratio(self) -> float:
+        """ Size of the raw rows divided by their compressed size """
+        blocks = self.blocks()
+        raw = (blocks[:, 2] * blocks[:, 3]).sum() * self.WIDTH * 8
+        return float(raw / max(blocks[:, 1].sum(), 1))
+
+    def blocks(self) -> np.ndarray:
+        """ (blocks, 4) offset, compressed size, amount of frames and rows per frame per block """
+        if not os.path.isfile(self.blocks_path):
+            raise FileNotFoundError()
+        return np.fromfile(self.blocks_path, dtype=np.int64).reshape((-1, 4))
+
+    def index(self) -> np.ndarray:
+        """ (frames, 4) iteration, block, frame in the block and amount of rows per frame """
+        if not os.path.isfile(self.index_path):
+            raise FileNotFoundError()
+        return np.fromfile(self.index_path, dtype=np.int64).reshape((-1, 4))
+
+    def rows(self) -> np.ndarray:
+        """ (rows, WIDTH) all stored rows, decoded in memory """
+        frames = list(self.read())
+        return np.concatenate(frames) if len(frames) > 0 else np.zeros((0, self.WIDTH))
+
+    def read(self) -> Generator[np.ndarray, None, None]:
+        blocks = self.blocks()
+        with open(self.path, 'rb') as f:
+            for block in range(len(blocks)):
+                yield from self._decode(f, blocks[block])
+
+    def read_frame(self, frame: int) -> np.ndarray:
+        """ Rows of a single frame, only its block is read and decompressed """
+        index = self.index()
+        frame = range(len(index))[frame]
+        return self.read_range(frame, frame + 1)[0]
+
+    def read_range(self, start: int = 0, stop: int | None = None, step: int = 1) -> list[np.ndarray]:
+        """ Rows per frame, views of the decoded blocks, only blocks holding one of the frames are decompressed """
+        blocks = self.blocks()
+        frames = []
+        with open(self.path, 'rb') as f:
+            for _, block, position, _ in self.index()[start:stop:step].tolist():
+                if self._cache[0] != block:
+                    self._cache = (block, self._decode(f, blocks[block]))
+                frames.append(self._cache[1][position])
+        return frames
+
+    def read_component(self, component: int | str, field: str = 'position') -> tuple[np.ndarray, np.ndarray]:
+        columns = self._columns(field)
+        cid = self._component_id(component)
+        iteration = self.index()[:, 0]
+        blocks = self.blocks()
+        firsts = np.r_[0, np.cumsum(blocks[:, 2])]  # Frames of a block are consecutive
+
+        # Components are the same in every frame of a block, so its row is looked up once per block
+        iterations = []
+        values = []
+        with open(self.path, 'rb') as f:
+            for block in range(len(blocks)):
+                decoded = self._decode(f, blocks[block])
+                row = np.flatnonzero(decoded[0, :, self.ID] == cid)
+                if len(row) > 0:
+                    iterations.append(iteration[firsts[block]:firsts[block + 1]])
+                    values.append(decoded[:, row[0], columns])
+
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, columns.stop - columns.start))
+        return np.concatenate(iterations), np.concatenate(values)
+
+    def truncate(self, iteration: int):
+        if not os.path.isfile(self.index_path):
+            return
+
+        index = self.index()
+        frames = int(np.searchsorted(index[:, 0], iteration, side='right'))
+        if frames == len(index):
+            return
+
+        # The block holding the first removed frame is removed, its frames before that one are saved again
+        _, block, position, _ = index[frames].tolist()
+        blocks = self.blocks()
+        with open(self.path, 'rb') as f:
+            kept = list(self._decode(f, blocks[block])[:position])
+        os.truncate(self.path, int(blocks[block, 0]))
+        os.truncate(self.blocks_path, blocks[:block].nbytes)
+        os.truncate(self.index_path, index[:frames - position].nbytes)
+        self._cache = (-1, None)
+
+        if len(kept) > 0:
+            self.temp_data = kept + self.temp_data
+            self.temp_iterations = index[frames - position:frames, 0].tolist() + self.temp_iterations
+            self.save()
+        self._keep_meta(np.concatenate([frame[:, self.ID] for frame in self.read()] + [np.zeros(0)]))
+
+    def _decode(self, f, block: np.ndarray) -> np.ndarray:
+        """ (frames, rows, WIDTH) of a block """
+        offset, size, frames, rows = block.tolist()
+        f.seek(offset)
+        raw = zstandard.ZstdDecompressor().decompress(f.read(size), max_output_size=frames * rows * self.WIDTH * 8)
+        delta = np.frombuffer(_unshuffle(raw), dtype=np.int64).reshape((self.WIDTH, rows, frames)).transpose((2, 1, 0))
+        return np.cumsum(delta, axis=0).view(np.float64)
+
+
+def _same_components(previous: np.ndarray, frame: np.ndarray) -> bool:
+    return len(previous) == len(frame) and np.array_equal(previous[:, BinaryStorage.ID], frame[:, BinaryStorage.ID])
+
+
+def _shuffle(raw: bytes) -> bytes:
+    """ Byte i of every 8 byte value next to each other """
+    return np.frombuffer(raw, dtype=np.uint8).reshape((-1, 8)).T.tobytes()
+
+
+def _unshuffle(raw: bytes) -> bytes:
+    return np.frombuffer(raw, dtype=np.uint8).reshape((8, -1)).T.tobytes()
@@ -0,0 +1,116 @@
+import queue
+import threading
+from typing import Generator
+
+import numpy as np
+
+from v1.engine.component.component import Component
+from v1.engine.storage.storage import Storage
+
+""" Queue items telling the writer to save what it has, and to stop """
+_FLUSH = object()
+_STOP = object()
+
+
+class AsyncStorage(Storage):
+    """ Wraps a storage so saving happens on a background thread and never stalls the simulation loop
+
+    Frames are prepared by the wrapped storage on the simulation thread, which only copies what it needs, and handed
+    to the writer thread through a bounded queue. When the writer falls behind by max_pending frames, append blocks
+    until there's room again. An error of the writer is raised on the simulation thread by the next append or save.
+    """
+
+    """ Storage doing the actual writing """
+    storage: Storage
+
+    """ Frames waiting for the writer before append blocks """
+    max_pending: int
+
+    def __init__(self, storage: Storage, max_pending: int = 1024):
+        super().__init__(storage.name, storage.store_interval)
+        self.path = storage.path
+        self.storage = storage
+        self.max_pending = max_pending
+
+        self._queue = queue.Queue(max_pending)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._write, name=f'storage-{storage.name}', daemon=True)
+        self._thread.start()
+
+    def append(self, data: object, iteration: int):
+        self._raise()
+        self._queue.put((self.storage.prepare(data), iteration))
+
+    def save(self):
+        """ Blocks until every frame appended so far is saved """
+        if self._thread.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+        self._raise()
+
+    def close(self):
+        if self._thread.is_alive():
+            self.save()
+            self._queue.put(_STOP)
+            self._thread.join()
+        self.storage.close()
+
+    def read(self) -> Generator[object, None, None]:
+        self.save()
+        return self.storage.read()
+
+    def read_as_objects(self) -> Generator[object, None, None]:
+        self.save()
+        return self.storage.read_as_objects()
+
+    def frame_count(self) -> int:
+        self.save()
+        return self.storage.frame_count()
+
+    def read_frame(self, frame: int) -> object:
+        self.save()
+        return self.storage.read_frame(frame)
+
+    def read_range(self, start: int = 0, stop: int | None = None, step: int = 1) -> list[object]:
+        self.save()
+        return self.storage.read_range(start, stop, step)
+
+    def read_component(self, component: int | str, field: str = 'position') -> tuple[np.ndarray, np.ndarray]:
+        self.save()
+        return self.storage.read_component(component, field)
+
+    def truncate(self, iteration: int):
+        self.save()
+        self.storage.truncate(iteration)
+
+    def to_objects(self, frame: object) -> dict[int, Component]:
+        return self.storage.to_objects(frame)
+
+    def _write(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if self._error is not None:
+                    # Keep draining, so the simulation thread never waits on a dead writer
+                    continue
+
+                if item is _FLUSH:
+                    if len(self.storage.temp_data) > 0:
+                        self.storage.save()
+                    continue
+
+                frame, iteration = item
+                self.storage.temp_data.append(frame)
+                self.storage.temp_iterations.append(iteration)
+                if len(self.storage.temp_data) % self.storage.store_interval == 0:
+                    self.storage.save()
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise(self):
+        if self._error is not None:
+            raise RuntimeError(f'Saving to "{self.storage.path}" failed') from self._error
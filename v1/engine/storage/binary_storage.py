@@ -0,0 +1,235 @@
+import json
+import os
+import struct
+from collections import deque
+from typing import Generator
+
+import numpy as np
+
+from v1.engine.component.body_store import BodySnapshot, BodyStore
+from v1.engine.component.component import Component
+from v1.engine.storage.storage import Storage
+from v1.engine.util.helper import to_serializable
+from v1.engine.util.quaternion import Quaternion
+from v1.engine.util.vector3d import Vector3D
+
+
+class BinaryStorage(Storage):
+    """ Append-only binary trajectory of physical components, readable with np.memmap
+
+    Files, next to each other and named after the rows, e.g. x.bin.idx:
+        .bin: header followed by float64 rows of id | position (3) | velocity (3) | rotation (4), frame after frame
+        .bin.idx: int64 per frame: iteration | first row | amount of rows
+        .bin.meta: json line per component, written the first frame it appears, holds what's needed to rebuild it
+
+    The columns are the first columns of a BodyStore row, so a frame is the leading columns of a BodySnapshot.
+    Construct with clear=False to open a stored trajectory, to read it or to append to it.
+    """
+
+    MAGIC = b'PSIM'
+    VERSION = 1
+
+    """ Header: magic | version | amount of columns, padded to 16 bytes """
+    HEADER = struct.Struct('<4sHH8x')
+
+    """ Columns of a row, same as the first columns of a BodyStore row """
+    ID = BodyStore.ID
+    POSITION = BodyStore.POSITION
+    VELOCITY = BodyStore.VELOCITY
+    ROTATION = BodyStore.ROTATION
+    WIDTH = BodyStore.ROTATION.stop
+
+    """ Columns per field, @see read_component """
+    FIELDS = {
+        'id': slice(ID, ID + 1),
+        'position': POSITION,
+        'velocity': VELOCITY,
+        'rotation': ROTATION,
+    }
+
+    """ Extension of the file holding the rows """
+    EXTENSION = '.bin'
+
+    def __init__(self, name: str, store_interval: int, clear: bool = True):
+        """ :param clear: Remove what's stored under this name, otherwise frames are appended to it """
+        super().__init__(name, store_interval)
+        self.path += self.EXTENSION
+        self.index_path = self.path + '.idx'
+        self.meta_path = self.path + '.meta'
+
+        if clear:
+            for path in [self.path, self.index_path, self.meta_path]:
+                if os.path.isfile(path):
+                    os.remove(path)
+
+        self._known = np.zeros(0, dtype=bool)  # Per component id, whether its metadata is stored
+        if os.path.isfile(self.meta_path):
+            ids = list(self._meta())
+            self._known = np.zeros(max(ids, default=-1) + 1, dtype=bool)
+            self._known[ids] = True
+        self._temp_meta = deque()  # Appended by prepare and consumed by save, which may run on another thread
+        self._meta_cache: dict[int, dict] | None = None  # Stored metadata, @see to_objects
+
+    def prepare(self, snapshot: BodySnapshot) -> np.ndarray:
+        """ Rows of the frame, the leading columns of the snapshot """
+        rows = snapshot.data[:, :self.WIDTH]
+
+        # Metadata of components seen for the first time
+        ids = rows[:, self.ID].astype(np.int64)
+        if len(ids) > 0 and ids.max() >= len(self._known):
+            self._known = np.r_[self._known, np.zeros(ids.max() + 1 - len(self._known), dtype=bool)]
+        for row in np.flatnonzero(~self._known[ids]).tolist():
+            self._temp_meta.append(json.dumps(snapshot.components[row], default=to_serializable))
+        self._known[ids] = True
+
+        return rows
+
+    def save(self):
+        print(f'Saving {len(self.temp_data)} frame(s) to "{self.path}"..')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        file_exists = os.path.isfile(self.path)
+        rows_written = (os.path.getsize(self.path) - self.HEADER.size) // (self.WIDTH * 8) if file_exists else 0
+
+        counts = np.array([len(rows) for rows in self.temp_data], dtype=np.int64)
+        index = np.empty((len(counts), 3), dtype=np.int64)
+        index[:, 0] = self.temp_iterations
+        index[:, 1] = rows_written + np.r_[0, np.cumsum(counts)[:-1]]
+        index[:, 2] = counts
+
+        with open(self.path, 'ab') as f:
+            if not file_exists:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.WIDTH))
+            for rows in self.temp_data:
+                f.write(rows.tobytes())
+        with open(self.index_path, 'ab') as f:
+            f.write(index.tobytes())
+        self._save_meta()
+
+        self.temp_data = []
+        self.temp_iterations = []
+        print('Saved!')
+
+    def _save_meta(self):
+        lines = [self._temp_meta.popleft() for _ in range(len(self._temp_meta))]
+        with open(self.meta_path, 'a') as f:
+            f.writelines(line + '\n' for line in lines)
+
+    def rows(self) -> np.ndarray:
+        """ (rows, WIDTH) memory map of all stored rows, frames are ranges of it @see index """
+        if not os.path.isfile(self.path):
+            raise FileNotFoundError()
+
+        with open(self.path, 'rb') as f:
+            magic, version, width = self.HEADER.unpack(f.read(self.HEADER.size))
+        if magic != self.MAGIC or width != self.WIDTH:
+            raise TypeError(f'File "{self.path}" does not contain right format')
+
+        rows = (os.path.getsize(self.path) - self.HEADER.size) // (width * 8)
+        if rows == 0:
+            return np.zeros((0, width))
+        return np.memmap(self.path, dtype=np.float64, mode='r', offset=self.HEADER.size, shape=(rows, width))
+
+    def index(self) -> np.ndarray:
+        """ (frames, 3) iteration, first row and amount of rows per frame """
+        if not os.path.isfile(self.index_path):
+            raise FileNotFoundError()
+        return np.fromfile(self.index_path, dtype=np.int64).reshape((-1, 3))
+
+    def read(self) -> Generator[np.ndarray, None, None]:
+        """ Rows per frame, views of the memory map without copying """
+        rows = self.rows()
+        for _, first, count in self.index().tolist():
+            yield rows[first:first + count]
+
+    def frame_count(self) -> int:
+        return len(self.index())
+
+    def read_frame(self, frame: int) -> np.ndarray:
+        _, first, count = self.index()[frame].tolist()
+        return self.rows()[first:first + count]
+
+    def read_range(self, start: int = 0, stop: int | None = None, step: int = 1) -> list[np.ndarray]:
+        rows = self.rows()
+        return [rows[first:first + count] for _, first, count in self.index()[start:stop:step].tolist()]
+
+    def read_component(self, component: int | str, field: str = 'position') -> tuple[np.ndarray, np.ndarray]:
+        columns = self._columns(field)
+        rows = self.rows()
+        index = self.index()
+
+        # Frame of every matching row is the last frame starting at or before it
+        matches = np.flatnonzero(rows[:, self.ID] == self._component_id(component))
+        frames = np.searchsorted(index[:, 1], matches, side='right') - 1
+        return index[frames, 0], np.array(rows[matches, columns])
+
+    def truncate(self, iteration: int):
+        if not os.path.isfile(self.index_path):
+            return
+
+        index = self.index()
+        frames = int(np.searchsorted(index[:, 0], iteration, side='right'))
+        if frames == len(index):
+            return
+
+        rows = int(index[frames - 1, 1:].sum()) if frames > 0 else 0
+        os.truncate(self.path, self.HEADER.size + rows * self.WIDTH * 8)
+        os.truncate(self.index_path, index[:frames].nbytes)
+        self._keep_meta(self.rows()[:, self.ID])
+
+    def _keep_meta(self, ids: np.ndarray):
+        """ Removes the metadata of components other than ids, so components only in removed frames are stored again
+        when they appear
+        """
+        ids = set(ids.astype(np.int64).tolist())
+        if os.path.isfile(self.meta_path):
+            with open(self.meta_path, 'r') as f:
+                lines = [line for line in f if json.loads(line)['id'] in ids]
+            with open(self.meta_path, 'w') as f:
+                f.writelines(lines)
+
+        self._known = np.zeros(max(ids, default=-1) + 1, dtype=bool)
+        self._known[list(ids)] = True
+        self._meta_cache = None
+
+    def _columns(self, field: str) -> slice:
+        if field not in self.FIELDS:
+            raise ValueError(f'Field "{field}" is not stored, only {", ".join(self.FIELDS)}')
+        return self.FIELDS[field]
+
+    def _component_id(self, component: int | str) -> int:
+        if not isinstance(component, str):
+            return component
+
+        for item in self._meta().values():
+            if item['name'] == component:
+                return item['id']
+        raise KeyError(f'No component named "{component}" stored')
+
+    def _meta(self) -> dict[int, dict]:
+        """ Serialized components by id """
+        meta = {}
+        with open(self.meta_path, 'r') as f:
+            for line in f:
+                item = json.loads(line)
+                meta[item['id']] = item
+        return meta
+
+    def read_as_objects(self) -> Generator[dict[int, Component], None, None]:
+        for frame in self.read():
+            yield self.to_objects(frame)
+
+    def to_objects(self, frame: np.ndarray) -> dict[int, Component]:
+        # Metadata is read again once a frame holds a component not seen before
+        ids = frame[:, self.ID].astype(np.int64).tolist()
+        if self._meta_cache is None or not all(cid in self._meta_cache for cid in ids):
+            self._meta_cache = self._meta()
+
+        components = {}
+        for cid, row in zip(ids, frame.tolist()):
+            c = Storage.decode_recursive(self._meta_cache[cid])
+            c.position = Vector3D(*row[self.POSITION])
+            c.velocity = Vector3D(*row[self.VELOCITY])
+            c.rotation = Quaternion(*row[self.ROTATION])
+            components[c.id] = c
+        return components
@@ -0,0 +1,61 @@
+import os
+import pickle
+import threading
+
+from root import base_dir
+
+
+class Checkpoint:
+    """ Full state of a simulation every interval loops, pickled to a single file to resume from @see Simulation.resume
+
+    The state is pickled on the simulation thread, which is a single copy, and written to disk on a background thread.
+    Writing goes to a temporary file which replaces the checkpoint once complete, so a crash while writing keeps the
+    previous checkpoint intact.
+    """
+
+    path: str
+
+    """ Loops between checkpoints """
+    interval: int
+
+    def __init__(self, name: str, interval: int):
+        self.path = os.path.join(base_dir(), 'data', name + '.ckpt')
+        self.interval = interval
+
+        self._thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+
+    def write(self, state: object):
+        """ Pickles state and writes it on the background thread, once the previous checkpoint is written """
+        data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+        self.wait()
+        self._thread = threading.Thread(target=self._write, args=(data,), name=f'checkpoint-{self.path}', daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        """ Blocks until the last checkpoint is written """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f'Writing checkpoint "{self.path}" failed') from error
+
+    def _write(self, data: bytes):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException as e:
+            self._error = e
+
+    @staticmethod
+    def load(path: str) -> object:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
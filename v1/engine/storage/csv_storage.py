@@ -1,10 +1,14 @@
+import bisect
 import csv
 import json
 import os
 
-from v1.engine.component.component import Component
-from v1.engine.storage.storage import Storage
-from v1.engine.util.helper import to_fqn
+import numpy as np
+
+from v1.engine.component.body_store import BodySnapshot
+from v1.engine.storage.line_index import LineIndex
+from v1.engine.storage.storage import Storage, component_field
+from v1.engine.util.helper import to_serializable
 
 
 class CSVStoreIterator:
@@ -34,9 +38,13 @@ class CSVStoreIterator:
         #       test with loads en dumps pickle vs json for million dicts = 2.77s for json, 0.44s for pickle.
         #       But json uses **__dict__ which cannot be used with pickle, therefore it has to preprocess the data first
         #       and may affect performance
+        data = self._data[self._index]
+        if isinstance(data, BodySnapshot):
+            # Components are only created when saving, so storing a frame costs a single copy
+            data = data.to_frame()
         item = [
             str(self._iterations[self._index]),
-            json.dumps(self._data[self._index], default=lambda o: {'_fqn': to_fqn(o), **o.__dict__}),
+            json.dumps(data, default=to_serializable),
         ]
 
         # 22.46s for 180 000 frames
@@ -46,12 +54,20 @@ class CSVStoreIterator:
 
 
 class CSVStorage(Storage):
-    def __init__(self, name: str, store_interval: int):
+    """ Row of iteration and json per frame, rows are single lines as json escapes line breaks in strings. Construct
+    with clear=False to open stored frames, to read them or to append to them.
+    """
+
+    """ Byte offset of every row, for random access """
+    lines: LineIndex
+
+    def __init__(self, name: str, store_interval: int, clear: bool = True):
+        """ :param clear: Remove what's stored under this name, otherwise frames are appended to it """
         super().__init__(name, store_interval)
         self.path += '.csv'
-
-        if os.path.isfile(self.path):
-            os.remove(self.path)
+        self.lines = LineIndex(self.path, skip=1)
+        if clear:
+            self.lines.clear()
 
     def read(self):
         if not os.path.isfile(self.path):
@@ -63,6 +79,37 @@ class CSVStorage(Storage):
         for row in reader:
             yield json.loads(row[1])
 
+    def frame_count(self) -> int:
+        return self.lines.count()
+
+    def read_frame(self, frame: int) -> dict:
+        frame = range(self.frame_count())[frame]
+        return self.read_range(frame, frame + 1)[0]
+
+    def read_range(self, start: int = 0, stop: int | None = None, step: int = 1) -> list[dict]:
+        return [json.loads(next(csv.reader([line.decode()], delimiter=';'))[1])
+                for line in self.lines.read(start, stop, step)]
+
+    def truncate(self, iteration: int):
+        if not os.path.isfile(self.path):
+            return
+
+        # Iterations increase, so only a few rows are read
+        frames = bisect.bisect_right(range(self.frame_count()), iteration, key=self._iteration)
+        self.lines.truncate(frames)
+
+    def _iteration(self, frame: int) -> int:
+        return int(self.lines.read(frame, frame + 1)[0].split(b';', 1)[0])
+
+    def read_component(self, component: int | str, field: str = 'position') -> tuple[np.ndarray, np.ndarray]:
+        if not os.path.isfile(self.path):
+            raise FileNotFoundError()
+
+        with open(self.path, 'r') as f:
+            reader = csv.reader(f, delimiter=';')
+            next(reader)  # Skip headers
+            return component_field(((int(iteration), json.loads(data)) for iteration, data in reader), component, field)
+
     def read_as_objects(self):
         for item in self.read():
             yield Storage.decode_recursive(item)
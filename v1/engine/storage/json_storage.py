@@ -1,28 +1,114 @@
+import bisect
 import json
 import os.path
+from typing import Generator
 
+import numpy as np
+
+from v1.engine.component.body_store import BodySnapshot
 from v1.engine.component.component import Component
+from v1.engine.storage.line_index import LineIndex
+from v1.engine.storage.storage import Storage, component_field, decoder
+from v1.engine.util.helper import to_fqn, to_serializable
+from v1.engine.util.quaternion import Quaternion
+from v1.engine.util.vector3d import Vector3D
+
+
+class JSONStorage(Storage):
+    """ Newline delimited json, a line of { "iteration": int, "frame": { component_id: component } } per frame
+
+    Saving only appends the lines of the frames in memory, and reading decodes a line at a time. Construct with
+    clear=False to open stored frames, to read them or to append to them.
+    """
+
+    """ Bytes buffered before writing to the file """
+    WRITE_BUFFER = 1 << 20
+
+    """ Byte offset of every line, for random access """
+    lines: LineIndex
+
+    def __init__(self, name: str, store_interval: int, clear: bool = True):
+        """ :param clear: Remove what's stored under this name, otherwise frames are appended to it """
+        super().__init__(name, store_interval)
+        self.path += '.ndjson'
+        self.lines = LineIndex(self.path)
+        if clear:
+            self.lines.clear()
+
+    def save(self):
+        print(f'Saving {len(self.temp_data)} frame(s) to "{self.path}"..')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with open(self.path, 'a', buffering=self.WRITE_BUFFER) as f:
+            f.writelines(_line(frame, iteration) for frame, iteration in zip(self.temp_data, self.temp_iterations))
+
+        self.temp_data = []
+        self.temp_iterations = []
+        print('Saved!')
+
+    def read(self) -> Generator[dict, None, None]:
+        for _, frame in self._lines():
+            yield frame
+
+    def read_as_objects(self) -> Generator[dict[str, Component], None, None]:
+        for _, frame in self._lines(object_hook=_decode):
+            yield frame
+
+    def frame_count(self) -> int:
+        return self.lines.count()
+
+    def read_frame(self, frame: int) -> dict:
+        frame = range(self.frame_count())[frame]
+        return self.read_range(frame, frame + 1)[0]
+
+    def read_range(self, start: int = 0, stop: int | None = None, step: int = 1) -> list[dict]:
+        return [json.loads(line)['frame'] for line in self.lines.read(start, stop, step)]
+
+    def read_component(self, component: int | str, field: str = 'position') -> tuple[np.ndarray, np.ndarray]:
+        return component_field(self._lines(), component, field)
+
+    def truncate(self, iteration: int):
+        if not os.path.isfile(self.path):
+            return
+
+        # Iterations increase, so only a few lines are read
+        frames = bisect.bisect_right(range(self.frame_count()), iteration, key=self._iteration)
+        self.lines.truncate(frames)
+
+    def _iteration(self, frame: int) -> int:
+        return json.loads(self.lines.read(frame, frame + 1)[0])['iteration']
+
+    def _lines(self, object_hook=None) -> Generator[tuple[int, dict], None, None]:
+        """ Iteration and frame per line """
+        if not os.path.isfile(self.path):
+            raise FileNotFoundError()
+
+        with open(self.path, 'r') as f:
+            for line in f:
+                item = json.loads(line, object_hook=object_hook)
+                yield item['iteration'], item['frame']
 
 
-class JSONStorage:
-    path: str
+def _line(frame: object, iteration: int) -> str:
+    if isinstance(frame, BodySnapshot):
+        # Components are only created when saving, so storing a frame costs a single copy
+        frame = frame.to_frame()
+    return json.dumps({'iteration': iteration, 'frame': frame}, default=to_serializable) + '\n'
 
-    def __init__(self, path: str):
-        self.path = path
 
-    def read(self) -> list[dict[int, Component]] | None:
-        if not os.path.exists(self.path):
-            return None
+""" Decoders of the values stored most, skipping the lookup of the class and its keyword arguments """
+_FAST = {
+    to_fqn(Vector3D(0, 0, 0)): lambda obj: Vector3D(obj['x'], obj['y'], obj['z']),
+    to_fqn(Quaternion(1, 0, 0, 0)): lambda obj: Quaternion(obj['w'], obj['x'], obj['y'], obj['z']),
+}
 
-        return json.load(open(self.path, 'r'))
 
-    def store(self, frame: dict[id, Component]):
-        with open(self.path, 'x') as f:
-            content = json.load(f)
-            if content == '':
-                content = []
-            if not isinstance(content, list):
-                raise TypeError(f'File "{self.path}" does not contain right format')
+def _decode(obj: dict) -> object:
+    """ Object hook of json, objects are decoded innermost first so their values are already decoded """
+    fqn = obj.get('_fqn')
+    if fqn is None:
+        return obj
+    if fqn in _FAST:
+        return _FAST[fqn](obj)
 
-            content.append(frame)
-            json.dump(content, f)
+    return decoder(fqn, tuple(obj))(obj, 0)
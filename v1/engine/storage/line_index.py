@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+
+class LineIndex:
+    """ Byte offset of every line of a text file holding a frame per line, kept in a file next to it named after the
+    file, e.g. x.csv.idx for x.csv
+
+    The index is built the first time it's needed and extended with the lines appended since, so a frame is a seek
+    away instead of parsing every frame before it.
+    """
+
+    """ Bytes scanned for line ends at once """
+    CHUNK = 1 << 24
+
+    path: str
+    index_path: str
+
+    """ Lines at the start of the file that are not frames, e.g. headers """
+    skip: int
+
+    def __init__(self, path: str, skip: int = 0):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.skip = skip
+        self._offsets = None
+
+    def clear(self):
+        """ Removes the file and its index """
+        for path in [self.path, self.index_path]:
+            if os.path.isfile(path):
+                os.remove(path)
+        self._offsets = None
+
+    def offsets(self) -> np.ndarray:
+        """ (lines + 1,) byte offset of every frame line, followed by the end of the last one """
+        if not os.path.isfile(self.path):
+            raise FileNotFoundError()
+
+        if self._offsets is None:
+            self._offsets = np.fromfile(self.index_path, dtype=np.int64) if os.path.isfile(self.index_path) \
+                else np.zeros(0, dtype=np.int64)
+
+        size = os.path.getsize(self.path)
+        end = int(self._offsets[-1]) if len(self._offsets) > 0 else 0
+        if end < size:
+            ends = []
+            with open(self.path, 'rb') as f:
+                f.seek(end)
+                for position in range(end, size, self.CHUNK):
+                    chunk = np.frombuffer(f.read(min(self.CHUNK, size - position)), dtype=np.uint8)
+                    ends.append(position + 1 + np.flatnonzero(chunk == ord('\n')))
+            ends = np.concatenate(ends)
+
+            # Line ends are where the next line starts, the first line starts at 0
+            if len(self._offsets) == 0:
+                ends = np.r_[0, ends][self.skip:].astype(np.int64)
+
+            with open(self.index_path, 'ab') as f:
+                f.write(ends.tobytes())
+            self._offsets = np.r_[self._offsets, ends]
+
+        return self._offsets
+
+    def truncate(self, lines: int):
+        """ Keeps the first lines of the file and their index, and removes the lines after """
+        offsets = self.offsets()[:lines + 1]
+        os.truncate(self.path, int(offsets[-1]))
+        os.truncate(self.index_path, offsets.nbytes)
+        self._offsets = offsets
+
+    def count(self) -> int:
+        return max(len(self.offsets()) - 1, 0)
+
+    def read(self, start: int = 0, stop: int | None = None, step: int = 1) -> list[bytes]:
+        """ Lines start to stop with steps of step, same as slicing a list of all lines """
+        offsets = self.offsets()
+        lines = []
+        with open(self.path, 'rb') as f:
+            for line in range(*slice(start, stop, step).indices(len(offsets) - 1)):
+                f.seek(offsets[line])
+                lines.append(f.read(offsets[line + 1] - offsets[line]))
+        return lines
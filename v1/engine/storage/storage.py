@@ -1,6 +1,9 @@
 import os.path
 from abc import abstractmethod
-from typing import Generator
+from keyword import iskeyword
+from typing import Callable, Generator, Iterable
+
+import numpy as np
 
 from root import base_dir
 from v1.engine.component.component import Component
@@ -17,21 +20,27 @@ class Storage:
     store_interval: int
 
     """ Temp rows and iterations stored in memory """
-    temp_data: list[object] = []
-    temp_iterations: list[int] = []
+    temp_data: list[object]
+    temp_iterations: list[int]
 
     def __init__(self, name: str, store_interval: int):
         self.name = name
         self.path = os.path.join(base_dir(), 'data', name)
         self.store_interval = store_interval
+        self.temp_data = []
+        self.temp_iterations = []
 
     def append(self, data: object, iteration: int):
-        self.temp_data.append(data)
+        self.temp_data.append(self.prepare(data))
         self.temp_iterations.append(iteration)
 
         if len(self.temp_data) % self.store_interval == 0:
             self.save()
 
+    def prepare(self, data: object) -> object:
+        """ Frame as kept in memory until saved, called on the simulation thread while data is still changing """
+        return data
+
     @abstractmethod
     def read(self) -> Generator[object, None, None]:
         pass
@@ -40,12 +49,50 @@ class Storage:
     def read_as_objects(self) -> Generator[object, None, None]:
         pass
 
+    @abstractmethod
+    def frame_count(self) -> int:
+        """ Amount of saved frames """
+        pass
+
+    @abstractmethod
+    def read_frame(self, frame: int) -> object:
+        """ Saved frame at position frame, 0 being the first, without reading the frames before it """
+        pass
+
+    def read_range(self, start: int = 0, stop: int | None = None, step: int = 1) -> list[object]:
+        """ Saved frames start to stop with steps of step, same as slicing a list of all frames """
+        return [self.read_frame(frame) for frame in range(*slice(start, stop, step).indices(self.frame_count()))]
+
+    @abstractmethod
+    def read_component(self, component: int | str, field: str = 'position') -> tuple[np.ndarray, np.ndarray]:
+        """ A field of one component, by id or name, over all saved frames holding it
+
+        :return: (frames,) iterations and (frames, values) field per frame, e.g. x, y and z of the position
+        """
+        pass
+
+    @abstractmethod
+    def truncate(self, iteration: int):
+        """ Removes the saved frames after iteration, e.g. the frames saved after the checkpoint a simulation resumes
+        from. Iterations of saved frames increase, as a simulation appends them.
+        """
+        pass
+
+    def to_objects(self, frame: object) -> dict[int, Component]:
+        """ Components of a frame as returned by read_frame or read_range { component_id: Component } """
+        return {int(cid): c for cid, c in Storage.decode_recursive(frame).items()}
+
     @abstractmethod
     def save(self):
         pass
 
+    def close(self):
+        """ Executed once when the simulation stops, after the last save """
+        pass
+
     @staticmethod
     def decode_recursive(obj, max_depth: int = 9):
+        """ Objects of json decoded data, a dict with a _fqn becomes an instance of that class @see decoder """
         if max_depth == 0:
             return obj
 
@@ -60,9 +107,69 @@ class Storage:
         # Assume dict
         # If contains _fqn, assume its a class
         if '_fqn' in obj:
-            return from_fqn(obj['_fqn'])(**{
-                k: Storage.decode_recursive(obj[k], max_depth - 1) for k in obj if k != '_fqn'
-            })
+            return decoder(obj['_fqn'], tuple(obj))(obj, max_depth - 1)
 
         # else normal dict
         return {k: Storage.decode_recursive(obj[k], max_depth - 1) for k in obj}
+
+
+def component_field(frames: Iterable[tuple[int, dict]], component: int | str,
+                    field: str) -> tuple[np.ndarray, np.ndarray]:
+    """ @see Storage.read_component, for iterations and json decoded frames { component_id: component } """
+    key = None if isinstance(component, str) else str(component)
+    iterations = []
+    values = []
+    for iteration, frame in frames:
+        if key is None:
+            key = next((k for k, item in frame.items() if item.get('name') == component), None)
+        if key in frame:
+            iterations.append(iteration)
+            values.append(_values(frame[key][field]))
+
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0))
+    return np.array(iterations, dtype=np.int64), np.array(values, dtype=np.float64).reshape((len(values), -1))
+
+
+def _values(item) -> list[float]:
+    """ Numbers of a serialized field, e.g. x, y and z of a Vector3D """
+    if isinstance(item, dict):
+        return [item[k] for k in item if k != '_fqn']
+    if isinstance(item, list):
+        return item
+    return [item]
+
+
+""" Generated decoders by fully qualified name and keys of the serialized object """
+_decoders: dict[tuple[str, tuple[str, ...]], Callable[[dict, int], object]] = {}
+
+
+def decoder(fqn: str, keys: tuple[str, ...]) -> Callable[[dict, int], object]:
+    """ Function building the class of fqn from a serialized object with these keys, values are decoded up to a depth
+
+    The class is looked up once and the keyword arguments are written out in the generated function, which only
+    decodes lists and dicts further, e.g. for Vector3D:
+        def decode(obj, depth):
+            return cls(x=v if (v := obj['x']).__class__ not in nested else value(v, depth), y=..., z=...)
+    """
+    key = (fqn, keys)
+    if key not in _decoders:
+        cls = from_fqn(fqn)
+        names = [k for k in keys if k != '_fqn']
+        if all(k.isidentifier() and not iskeyword(k) for k in names):
+            namespace = {'cls': cls, 'nested': (dict, list), 'value': _nested}
+            arguments = ', '.join(f'{k}=v if (v := obj[{k!r}]).__class__ not in nested else value(v, depth)'
+                                  for k in names)
+            exec(f'def decode(obj, depth):\n    return cls({arguments})', namespace)
+            _decoders[key] = namespace['decode']
+        else:
+            _decoders[key] = lambda obj, depth: cls(**{k: Storage.decode_recursive(obj[k], depth) for k in names})
+
+    return _decoders[key]
+
+
+def _nested(obj, max_depth: int):
+    """ Storage.decode_recursive going straight to the decoder for objects, the most common nested value """
+    if max_depth > 0 and obj.__class__ is dict and '_fqn' in obj:
+        return decoder(obj['_fqn'], tuple(obj))(obj, max_depth - 1)
+    return Storage.decode_recursive(obj, max_depth)
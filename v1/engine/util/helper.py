@@ -11,6 +11,12 @@ def to_fqn(obj):
     return module + '.' + name
 
 
+def to_serializable(obj) -> dict:
+    """ Object as dict including its fully qualified name, used as default for json """
+    data = obj.to_dict() if hasattr(obj, 'to_dict') else obj.__dict__
+    return {'_fqn': to_fqn(obj), **data}
+
+
 def from_fqn(fqn: str):
     components = fqn.split('.')
 
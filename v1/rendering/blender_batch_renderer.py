@@ -0,0 +1,86 @@
+import bpy
+import numpy as np
+
+from v1.engine.component.component import Component
+from v1.rendering.blender_renderer import BlenderRenderer
+
+
+class BlenderBatchRenderer(BlenderRenderer):
+    """ BlenderRenderer keeping keyframes in memory until save, which writes every F-curve at once
+
+    Inserting a keyframe per object per frame makes Blender update the F-curve every time, which dominates rendering
+    long runs. Here a frame only appends to a list, and save adds all points of an F-curve with a single
+    keyframe_points.add and foreach_set. The resulting .blend file is the same.
+    """
+
+    """ Animated properties of an object and their columns in a keyframe: frame | location (3) | rotation (4) """
+    CHANNELS = {
+        'location': [1, 2, 3],
+        'rotation_quaternion': [4, 5, 6, 7],
+    }
+
+    def __init__(self, fps: int, frame_limit: int, name: str):
+        super().__init__(fps, frame_limit, name)
+        self._keyframes: dict[int, list] = {}  # Keyframes per component id
+
+    def setup(self, frame: dict[int, Component]):
+        self._keyframes = {}
+        super().setup(frame)
+
+    def render_frame(self, frame: dict[int, Component]):
+        for cid in frame:
+            c = frame[cid]
+            self._keyframes[cid].append((
+                self.frame,
+                c.position.x, c.position.y, c.position.z,
+                c.rotation.w, c.rotation.x, c.rotation.y, c.rotation.z,
+            ))
+
+    def add_keyframes(self, cid: int, frames: np.ndarray, locations: np.ndarray, rotations: np.ndarray):
+        """ Keyframes of a component at once, e.g. from stored frames
+
+        :param frames: (F,) frame numbers
+        :param locations: (F, 3) positions
+        :param rotations: (F, 4) rotations as w, x, y, z
+        """
+        self._keyframes[cid] += np.c_[frames, locations, rotations].tolist()
+
+    def add_component(self, c: Component):
+        super().add_component(c)
+        self._keyframes[c.id] = []
+
+    def remove_component(self, c: Component):
+        # Same as inserting keyframes, the animation is removed with the object
+        del self._keyframes[c.id]
+        super().remove_component(c)
+
+    def save(self):
+        for cid, keyframes in self._keyframes.items():
+            if len(keyframes) == 0:
+                continue
+
+            keyframes = np.array(keyframes, dtype=np.float64)
+            obj = self._objects[cid]
+            if obj.animation_data is None:
+                obj.animation_data_create()
+            if obj.animation_data.action is None:
+                obj.animation_data.action = bpy.data.actions.new(f'{obj.name}Action')
+            fcurves = obj.animation_data.action.fcurves
+
+            for data_path, columns in self.CHANNELS.items():
+                for index, column in enumerate(columns):
+                    # Written from scratch, all keyframes are kept in memory
+                    fcurve = fcurves.find(data_path, index=index)
+                    if fcurve is not None:
+                        fcurves.remove(fcurve)
+                    fcurve = fcurves.new(data_path, index=index, action_group='Object Transforms')
+
+                    fcurve.keyframe_points.add(len(keyframes))
+                    fcurve.keyframe_points.foreach_set('co', keyframes[:, [0, column]].ravel())
+                    fcurve.update()
+
+            # Keyframes set the object, as it would be after inserting the last one
+            obj.location = keyframes[-1, 1:4]
+            obj.rotation_quaternion = keyframes[-1, 4:8]
+
+        super().save()
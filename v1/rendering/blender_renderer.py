@@ -10,8 +10,13 @@ from v1.rendering.renderer import Renderer
 class BlenderRenderer(Renderer):
     frame: int = 0
 
+    def __init__(self, fps: int, frame_limit: int, name: str):
+        super().__init__(fps, frame_limit, name)
+        self._objects: dict[int, bpy.types.Object] = {}  # Blender object per component id
+
     def setup(self, frame: dict[int, Component]):
         self._clear_scene()
+        self._objects = {}
 
         bpy.context.scene.unit_settings.system = 'METRIC'
         bpy.context.scene.unit_settings.system_rotation = 'RADIANS'
@@ -29,7 +34,7 @@ class BlenderRenderer(Renderer):
     def render_frame(self, frame: dict[int, Component]):
         for cid in frame:
             c = frame[cid]
-            obj = bpy.data.objects[c.name]
+            obj = self._objects[cid]
             obj.location = (c.position.x, c.position.y, c.position.z)
             obj.rotation_quaternion = (c.rotation.w, c.rotation.x, c.rotation.y, c.rotation.z)
             # obj.dimensions = (c.size.x, c.size.y, c.size.z)  TODO: Only scale can change
@@ -50,10 +55,11 @@ class BlenderRenderer(Renderer):
         obj.name = c.name
         obj.rotation_mode = 'QUATERNION'
         obj.dimensions = (c.size.x, c.size.y, c.size.z)
+        self._objects[c.id] = obj
 
     def remove_component(self, c: Component):
         bpy.ops.object.select_all(action='DESELECT')
-        bpy.data.objects[c.name].select_set(True)
+        self._objects.pop(c.id).select_set(True)
         bpy.ops.object.delete()
 
     def save(self):
@@ -0,0 +1,186 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from root import base_dir
+from v1.engine.component.component import Component
+from v1.engine.component.physical_component import PhysicalComponent
+from v1.rendering.renderer import Renderer
+
+""" Colors of components, by id """
+PALETTE = np.array([
+    [255, 255, 255],
+    [255, 196, 64],
+    [64, 160, 255],
+    [255, 96, 96],
+    [96, 224, 128],
+    [208, 128, 255],
+    [255, 160, 208],
+    [160, 224, 224],
+], dtype=np.uint8)
+
+
+class PreviewRenderer(Renderer):
+    """ Renders physical components as discs seen along an axis with NumPy, without Blender
+
+    Frames are written as PNG images to a directory, or as a single raw video file in the YUV4MPEG2 format which most
+    players and ffmpeg read. Meant for quick checks of what a simulation does, not for good looking results.
+    """
+
+    """ Image size in pixels """
+    width: int
+    height: int
+
+    """ Axes of positions shown horizontally and vertically in the image, (0, 1) looks down on the x-y plane """
+    axes: tuple[int, int]
+
+    """ Meters from the center to the closest edge of the image, None to fit all components of the first frame """
+    extent: float | None
+
+    """ Smallest radius of a disc in pixels, so small components stay visible """
+    min_radius: float
+
+    """ 'png' for an image per frame, 'y4m' for a raw video """
+    output: str
+
+    def __init__(self, fps: int, frame_limit: int, name: str, width: int = 640, height: int = 480,
+                 axes: tuple[int, int] = (0, 1), extent: float | None = None, min_radius: float = 1.5,
+                 output: str = 'png'):
+        super().__init__(fps, frame_limit, name)
+        if output not in ['png', 'y4m']:
+            raise ValueError(f'Output "{output}" is not supported, only png or y4m')
+
+        self.width = width
+        self.height = height
+        self.axes = axes
+        self.extent = extent
+        self.min_radius = min_radius
+        self.output = output
+        self.path = os.path.join(base_dir(), 'data', name)
+        self.frame = 1
+
+        self._center = np.zeros(2)
+
+        # PNG rows start with a filter byte, the image is a view of the rest. Video is drawn in YUV right away
+        self._raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+        self._image = self._raw[:, 1:].reshape((height, width, 3))
+        self._palette = PALETTE if output == 'png' else _yuv(PALETTE)
+        self._background = np.zeros(3, dtype=np.uint8) if output == 'png' else _yuv(np.zeros(3, dtype=np.uint8))
+        self._video = None
+        self._opened = False
+
+    def setup(self, frame: dict[int, Component]):
+        self._fit(frame)
+        self._open()
+        self.frame = 1
+
+    def render_frame(self, frame: dict[int, Component]):
+        self._image[:] = self._background
+
+        # Without setup, the first rendered frame with physical components decides the view. Frames before it stay
+        # empty, so the video keeps a frame per rendered frame
+        if self.extent is None:
+            self._fit(frame)
+        if not self._opened:
+            self._open()
+        if self.extent is not None:
+            self._draw(frame)
+
+        if self.output == 'png':
+            _write_png(os.path.join(self.path, f'{self.frame:06d}.png'), self._raw, self.width, self.height)
+        else:
+            # Planes of Y, U and V after each other
+            self._video.write(b'FRAME\n')
+            self._video.write(self._image.transpose((2, 0, 1)).tobytes())
+
+    def next_frame(self):
+        self.frame += 1
+
+    def save(self):
+        if self._video is not None:
+            self._video.close()
+            self._video = None
+
+    def add_component(self, c: Component):
+        pass
+
+    def remove_component(self, c: Component):
+        pass
+
+    def _draw(self, frame: dict[int, Component]):
+        """ Draws the physical components of the frame as discs onto the image """
+        image = self._image
+        positions, radii, colors = self._bodies(frame)
+
+        # Meters to pixels, y of the image points down
+        scale = min(self.width, self.height) / 2 / self.extent
+        x = (positions[:, 0] - self._center[0]) * scale + self.width / 2
+        y = self.height / 2 - (positions[:, 1] - self._center[1]) * scale
+        r = np.maximum(radii * scale, self.min_radius)
+
+        # Only the box around a disc is tested, discs are drawn in order of the components
+        for cx, cy, cr, color in zip(x.tolist(), y.tolist(), r.tolist(), colors):
+            x0, x1 = max(int(cx - cr), 0), min(int(cx + cr) + 1, self.width)
+            y0, y1 = max(int(cy - cr), 0), min(int(cy + cr) + 1, self.height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            dx = np.arange(x0, x1) + 0.5 - cx
+            dy = np.arange(y0, y1) + 0.5 - cy
+            image[y0:y1, x0:x1][dy[:, None] ** 2 + dx[None, :] ** 2 <= cr ** 2] = color
+
+    def _fit(self, frame: dict[int, Component]):
+        """ Centers the view on the components of the frame, and fits them if there's no extent. Without physical
+        components there's nothing to fit, the extent stays None then.
+        """
+        positions, _, _ = self._bodies(frame)
+        if len(positions) == 0:
+            return
+
+        lower, upper = positions.min(axis=0), positions.max(axis=0)
+        self._center = (lower + upper) / 2
+        if self.extent is None:
+            self.extent = max(float((upper - lower).max()) / 2 * 1.1, 1.0)
+
+    def _open(self):
+        self._opened = True
+        if self.output == 'png':
+            os.makedirs(self.path, exist_ok=True)
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._video = open(self.path + '.y4m', 'wb')
+        self._video.write(f'YUV4MPEG2 W{self.width} H{self.height} F{self.fps}:1 Ip A1:1 C444\n'.encode())
+
+    def _bodies(self, frame: dict[int, Component]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ (N, 2) projected positions, (N,) radii in meters and (N, 3) colors of the physical components """
+        components = [c for c in frame.values() if isinstance(c, PhysicalComponent)]
+        positions = np.array([(c.position.x, c.position.y, c.position.z) for c in components], dtype=np.float64)
+        positions = positions.reshape((-1, 3))[:, list(self.axes)]
+        radii = np.array([max(c.size.x, c.size.y, c.size.z) / 2 for c in components], dtype=np.float64)
+        colors = self._palette[np.array([c.id for c in components], dtype=np.int64) % len(PALETTE)]
+        return positions, radii, colors
+
+
+def _write_png(path: str, raw: np.ndarray, width: int, height: int):
+    """ Writes rows of RGB pixels preceded by their filter type, level 1 compresses fast and well enough for mostly
+    black images
+    """
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, 1)))
+        f.write(chunk(b'IEND', b''))
+
+
+def _yuv(rgb: np.ndarray) -> np.ndarray:
+    """ RGB colors in YUV, BT.601 limited range as YUV4MPEG2 expects """
+    rgb = rgb.astype(np.float64)
+    y = 16 + 0.257 * rgb[..., 0] + 0.504 * rgb[..., 1] + 0.098 * rgb[..., 2]
+    u = 128 - 0.148 * rgb[..., 0] - 0.291 * rgb[..., 1] + 0.439 * rgb[..., 2]
+    v = 128 + 0.439 * rgb[..., 0] - 0.368 * rgb[..., 1] - 0.071 * rgb[..., 2]
+    return np.round(np.stack([y, u, v], axis=-1)).astype(np.uint8)
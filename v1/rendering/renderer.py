@@ -8,6 +8,9 @@ class Renderer:
     frame_limit: int
     name: str
 
+    """ Number of the frame being rendered, set to the first frame by setup """
+    frame: int
+
     def __init__(self, fps: int, frame_limit: int, name: str):
         self.fps = fps
         self.frame_limit = frame_limit
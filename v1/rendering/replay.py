@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from v1.engine.component.component import Component
+from v1.engine.settings import Settings
+from v1.engine.storage.storage import Storage
+from v1.rendering.renderer import Renderer
+
+""" Renderer of a chunk from its number, e.g. with the number in its name so chunks don't overwrite each other """
+RendererFactory = Callable[[int], Renderer]
+
+
+class Replay:
+    """ Renders stored frames afterwards, so a simulation can run without renderer at full speed
+
+    Frames are streamed from the storage in batches, every step-th stored frame becomes a rendered frame. Components
+    appearing or disappearing in between are added to or removed from the renderer, as during a simulation.
+
+    The replay can run in another process after a headless run, it opens what the run stored:
+        Simulation([], [], storage=BinaryStorage('sun_earth', 1000)).start()  # Headless run
+        replay = Replay.open(BinaryStorage, 'sun_earth', step=Replay.decimation(30, 3600))
+        replay.render(PreviewRenderer(30, Settings.frame_limit, 'sun_earth'))
+    """
+
+    storage: Storage
+
+    """ Stored frames per rendered frame """
+    step: int
+
+    """ Stored frames read at once """
+    batch: int
+
+    def __init__(self, storage: Storage, step: int = 1, batch: int = 256):
+        self.storage = storage
+        self.step = step
+        self.batch = batch
+
+    @classmethod
+    def open(cls, storage: type[Storage], name: str, step: int = 1, batch: int = 256) -> 'Replay':
+        """ Replay of the frames an earlier run stored under name
+
+        :param storage: Storage class the run stored with, e.g. BinaryStorage. It's opened without removing the frames
+        """
+        return cls(storage(name, batch, clear=False), step, batch)
+
+    @staticmethod
+    def decimation(fps: int, speed: float, delta: float = None) -> int:
+        """ Step rendering fps frames per second of video showing speed simulated seconds per second
+
+        :param delta: ms simulated per stored frame, Settings.delta by default
+        """
+        delta = delta if delta is not None else Settings.delta
+        return max(1, round(speed / fps / (delta / 1000)))
+
+    def render(self, renderer: Renderer, start: int = 0, stop: int | None = None, first_frame: int = 1):
+        """ Renders stored frames start to stop and saves, the frame at start becomes first_frame of the renderer """
+        start, stop, _ = slice(start, stop).indices(self.storage.frame_count())
+        components: dict[int, Component] | None = None
+
+        for batch_start in range(start, stop, self.step * self.batch):
+            batch_stop = min(batch_start + self.step * self.batch, stop)
+            for frame in self.storage.read_range(batch_start, batch_stop, self.step):
+                frame = self.storage.to_objects(frame)
+
+                if components is None:
+                    renderer.setup(frame)
+                    renderer.frame = first_frame
+                else:
+                    for cid in components.keys() - frame.keys():
+                        renderer.remove_component(components[cid])
+                    for cid in frame.keys() - components.keys():
+                        renderer.add_component(frame[cid])
+                components = frame
+
+                renderer.render_frame(frame)
+                renderer.next_frame()
+
+        renderer.save()
+
+    def render_parallel(self, renderer: RendererFactory, chunks: int, start: int = 0, stop: int | None = None,
+                        processes: int | None = None):
+        """ Renders stored frames start to stop in chunks of consecutive frames, each on its own renderer in a process
+        pool. Frame numbers continue over chunks, chunk 2 starts where chunk 1 ends.
+
+        The storage and renderer factory are sent to the worker processes, so they have to be picklable: the factory
+        a function defined at module level, and not an AsyncStorage.
+        """
+        start, stop, _ = slice(start, stop).indices(self.storage.frame_count())
+        rendered = len(range(start, stop, self.step))
+        bounds = [rendered * chunk // chunks for chunk in range(chunks + 1)]
+
+        arguments = [
+            (self, renderer, chunk, start + bounds[chunk] * self.step, start + bounds[chunk + 1] * self.step,
+             1 + bounds[chunk])
+            for chunk in range(chunks) if bounds[chunk] < bounds[chunk + 1]
+        ]
+        with ProcessPoolExecutor(min(processes or os.cpu_count() or 1, len(arguments) or 1)) as executor:
+            list(executor.map(_render, arguments))
+
+
+def _render(arguments: tuple['Replay', RendererFactory, int, int, int, int]):
+    replay, renderer, chunk, start, stop, first_frame = arguments
+    replay.render(renderer(chunk), start, stop, first_frame)
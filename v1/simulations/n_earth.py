@@ -4,7 +4,7 @@ from v1.engine.component.physical_component import PhysicalComponent
 from v1.engine.settings import Settings
 from v1.engine.simulation import Simulation
 from v1.engine.util.vector3d import Vector3D
-from v1.rendering.blender_renderer import BlenderRenderer
+from v1.rendering.blender_batch_renderer import BlenderBatchRenderer
 
 Settings.fps = 30
 Settings.delta = 1000 * 60  # 1s * 60 = 1min
@@ -15,7 +15,7 @@ name = 'n_earth'
 sim = Simulation(
     [],
     [],
-    renderer=BlenderRenderer(Settings.fps, Settings.frame_limit, name),
+    renderer=BlenderBatchRenderer(Settings.fps, Settings.frame_limit, name),
     # storage=CSVStorage(name, 10000),
 )
 
@@ -7,7 +7,7 @@ from v1.engine.storage.csv_storage import CSVStorage
 from v1.engine.util.angle3d import Angle3D
 from v1.engine.util.quaternion import Quaternion
 from v1.engine.util.vector3d import Vector3D
-from v1.rendering.blender_renderer import BlenderRenderer
+from v1.rendering.blender_batch_renderer import BlenderBatchRenderer
 
 
 Settings.fps = 30
@@ -20,7 +20,7 @@ name = 'sun_earth'
 sim = Simulation(
     [],
     [],
-    renderer=BlenderRenderer(Settings.fps, Settings.frame_limit, name),
+    renderer=BlenderBatchRenderer(Settings.fps, Settings.frame_limit, name),
     # storage=CSVStorage(name, 10000),
 )
 